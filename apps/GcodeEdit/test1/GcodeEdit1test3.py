@@ -1,23 +1,355 @@
 import sys
-import re
+import os
+from collections import OrderedDict
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-    QLabel, QTextEdit, QFileDialog, QComboBox
+    QLabel, QFileDialog, QComboBox, QLineEdit, QProgressBar, QAbstractScrollArea,
+    QMessageBox
 )
-from PyQt5.QtGui import QTextCursor, QColor
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QFontDatabase, QPainter
+from PyQt5.QtCore import Qt, QThread, QStringListModel, pyqtSignal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from gcodetools import diff, dialects, layers, resume, search, syntax
+from gcodetools.document import GCodeDocument
+from gcodetools.lineindex import LineIndex
 
 class GCodeLoader(QThread):
-    loaded = pyqtSignal(str)
+    """Indexes a G-code file in chunks off the GUI thread.
+
+    The file is memory-mapped, so nothing is copied into the view: `opened`
+    hands over the GCodeDocument after the first chunk (the top of the file
+    can be shown at once), `progress` follows while the rest is indexed and
+    `loaded` brings the layer table, metadata and search index. requestInterruption()
+    stops it between chunks (e.g. when another file is opened). `failed` reports
+    a file that cannot be read (e.g. a corrupt .gz or a .zip without G-code).
+    """
+    CHUNK_SIZE = 1 << 20
+
+    opened = pyqtSignal(object)
+    progress = pyqtSignal(int)  # percent indexed
+    loaded = pyqtSignal(object, dict, object)
+    failed = pyqtSignal(str)
 
     def __init__(self, filename):
         super().__init__()
         self.filename = filename
 
     def run(self):
-        with open(self.filename, 'r', encoding='utf-8', errors='ignore') as f:
-            gcode = f.read()
-        self.loaded.emit(gcode)
+        # An exception escaping QThread.run aborts the application under PyQt5
+        try:
+            self.load()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def load(self):
+        line_index = LineIndex.from_text('')
+        # .gcode.gz / .zip are decompressed to a spool file, document.path
+        document = GCodeDocument(self.filename, line_index)
+        size = os.path.getsize(document.path) or 1
+        read = 0
+        opened = False
+        with open(document.path, 'rb') as f:
+            while not self.isInterruptionRequested():
+                data = f.read(self.CHUNK_SIZE)
+                line_index.extend(data)
+                if not opened:
+                    self.opened.emit(document)
+                    opened = True
+                read += len(data)
+                self.progress.emit(min(100, read * 100 // size))
+                if not data:
+                    break
+        if not opened:
+            document.close()  # interrupted before the view got it
+        if self.isInterruptionRequested():
+            return
+        # Layer table comes from the sidecar cache when the file was opened before;
+        # otherwise it is built in the same scan as the search index
+        layer_table = layers.read_layer_table(self.filename)
+        metadata = dialects.read_metadata(self.filename)
+        search_index = search.build_search_index(document.path, layer_table)
+        if self.isInterruptionRequested():
+            return
+        if layer_table is None:
+            layer_table = search_index.layers
+            try:
+                layers.save_layer_table(self.filename, layer_table)
+            except OSError:
+                pass  # read-only folder, just don't cache
+        self.loaded.emit(layer_table, metadata, search_index)
+
+class DiffWorker(QThread):
+    """Runs gcodetools.diff on the file on disk and another slice."""
+    finished_diff = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_a, file_b):
+        super().__init__()
+        self.file_a = file_a
+        self.file_b = file_b
+
+    def run(self):
+        # Corrupt archives raise BadZipFile / EOFError; nothing may escape QThread.run
+        try:
+            self.finished_diff.emit(diff.diff_files(self.file_a, self.file_b))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class GCodeView(QAbstractScrollArea):
+    """Virtualized G-code view.
+
+    Only the lines inside the viewport are ever fetched from the document and
+    painted, so the cost of opening, scrolling or jumping does not depend on
+    the file size. The vertical scrollbar counts lines. Double-click (or
+    Enter / F2) edits the current line in place, Insert adds a line below it
+    and Ctrl+Delete removes it; edits go to the document's piece table.
+
+    Highlighting works the same way: a line is tokenized the first time it
+    is painted and its spans are kept in a small LRU cache, so scrolling back
+    and forth costs nothing and lines never shown are never tokenized.
+    """
+    TOKEN_CACHE_LINES = 4096
+    SYNTAX_COLORS = {
+        syntax.TOKEN_COMMAND: QColor("#1f4fbf"),
+        syntax.TOKEN_AXIS: QColor("#a0522d"),
+        syntax.TOKEN_PARAM: QColor("#2e7d32"),
+        syntax.TOKEN_COMMENT: QColor("#808080"),
+        syntax.TOKEN_LAYER: QColor("#d35400"),
+    }
+
+    line_edited = pyqtSignal(int)
+    lines_changed = pyqtSignal(int, int)  # first line, change in line count
+
+    def __init__(self):
+        super().__init__()
+        self.document = None
+        self.current_line = -1
+        self.highlight = None  # (first, last) line range painted behind the text
+        self.layer_range = None  # (first, end) lines of the current layer, marked in the gutter
+        self._tokens = OrderedDict()  # line_no -> syntax spans, most recent last
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.line_editor = QLineEdit(self.viewport())
+        self.line_editor.setFrame(False)
+        self.line_editor.hide()
+        self.line_editor.editingFinished.connect(self.commit_edit)
+        self._edit_line = None
+        self.read_only = True
+
+    def set_document(self, document):
+        self.line_editor.hide()
+        self._edit_line = None
+        self.read_only = True  # until the document is fully indexed
+        self.document = document
+        self._tokens.clear()
+        self.current_line = 0 if document is not None else -1
+        self.highlight = None
+        self.layer_range = None
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def line_count(self):
+        return len(self.document) if self.document is not None else 0
+
+    def line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def first_visible_line(self):
+        return self.verticalScrollBar().value()
+
+    def update_scrollbars(self):
+        visible = self.visible_lines()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.line_count() - visible))
+        bar.setPageStep(visible)
+        self.viewport().update()
+
+    def gutter_width(self):
+        digits = len(str(max(1, self.line_count())))
+        return self.fontMetrics().horizontalAdvance('9' * digits) + 12
+
+    def scroll_to_line(self, line_no):
+        """Bring line_no into view, a third of the way down when it was off screen."""
+        first = self.first_visible_line()
+        visible = self.visible_lines()
+        if not first <= line_no < first + visible:
+            self.verticalScrollBar().setValue(line_no - visible // 3)
+
+    def set_current_line(self, line_no):
+        if self.document is None:
+            return
+        self.current_line = max(0, min(line_no, self.line_count() - 1))
+        self.scroll_to_line(self.current_line)
+        self.viewport().update()
+
+    def set_highlight(self, first, last=None):
+        self.highlight = None if first is None else (first, first if last is None else last)
+        self.viewport().update()
+
+    def set_layer_range(self, first, end):
+        self.layer_range = (first, end)
+        self.viewport().update()
+
+    def line_at(self, y):
+        return self.first_visible_line() + y // self.line_height()
+
+    # Painting
+
+    def tokens(self, line_no, text):
+        spans = self._tokens.get(line_no)
+        if spans is None:
+            spans = syntax.tokenize(text)
+            self._tokens[line_no] = spans
+            if len(self._tokens) > self.TOKEN_CACHE_LINES:
+                self._tokens.popitem(last=False)
+        else:
+            self._tokens.move_to_end(line_no)
+        return spans
+
+    def draw_line(self, painter, x, y, text, spans):
+        metrics = self.fontMetrics()
+        plain = self.palette().text().color()
+        pos = 0
+        for start, end, kind in spans + [(len(text), len(text), None)]:
+            for part, color in ((text[pos:start], plain), (text[start:end], self.SYNTAX_COLORS.get(kind))):
+                if part:
+                    painter.setPen(color)
+                    painter.drawText(x, y, part)
+                    x += metrics.horizontalAdvance(part)
+            pos = end
+        return x
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.base())
+        if self.document is None:
+            return
+        metrics = self.fontMetrics()
+        height = self.line_height()
+        gutter = self.gutter_width()
+        x_offset = gutter + 4 - self.horizontalScrollBar().value()
+        width = self.viewport().width()
+        first = self.first_visible_line()
+        last = min(first + self.visible_lines() + 1, self.line_count())
+        widest = 0
+
+        for row, line_no in enumerate(range(first, last)):
+            y = row * height
+            if self.highlight and self.highlight[0] <= line_no <= self.highlight[1]:
+                painter.fillRect(0, y, width, height, QColor("#2aa6e9"))  # Light blue
+            elif line_no == self.current_line:
+                painter.fillRect(0, y, width, height, QColor("#e8f2fb"))
+            text = self.document.line(line_no)
+            right = self.draw_line(painter, x_offset, y + metrics.ascent(), text,
+                                   self.tokens(line_no, text))
+            widest = max(widest, right - x_offset)
+
+        # Line numbers over the text, so they stay put when scrolling sideways
+        painter.fillRect(0, 0, gutter, self.viewport().height(), palette.window())
+        if self.layer_range:
+            top = max(self.layer_range[0], first) - first
+            bottom = min(self.layer_range[1], last) - first
+            if bottom > top:
+                painter.fillRect(gutter - 4, top * height, 3, (bottom - top) * height,
+                                 QColor("#2aa6e9"))
+        painter.setPen(QColor("#808080"))
+        for row, line_no in enumerate(range(first, last)):
+            painter.drawText(0, row * height, gutter - 6, height,
+                             Qt.AlignRight | Qt.AlignVCenter, str(line_no + 1))
+        painter.end()
+
+        # Horizontal range follows the widest line seen so far on screen
+        bar = self.horizontalScrollBar()
+        bar.setPageStep(width)
+        bar.setRange(0, max(bar.maximum(), widest + gutter + 8 - width))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.commit_edit()
+        self.viewport().update()
+
+    # Navigation and editing
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.commit_edit()
+            self.set_current_line(self.line_at(event.pos().y()))
+
+    def mouseDoubleClickEvent(self, event):
+        self.edit_line(self.line_at(event.pos().y()))
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        steps = {Qt.Key_Up: -1, Qt.Key_Down: 1,
+                 Qt.Key_PageUp: -self.visible_lines(), Qt.Key_PageDown: self.visible_lines()}
+        if key in steps:
+            self.set_current_line(self.current_line + steps[key])
+        elif key == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.set_current_line(0)
+        elif key == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.set_current_line(self.line_count() - 1)
+        elif key in (Qt.Key_Return, Qt.Key_Enter, Qt.Key_F2):
+            self.edit_line(self.current_line)
+        elif key == Qt.Key_Insert:
+            self.insert_line(self.current_line + 1)
+        elif key == Qt.Key_Delete and event.modifiers() & Qt.ControlModifier:
+            self.delete_line(self.current_line)
+        else:
+            super().keyPressEvent(event)
+
+    def insert_line(self, line_no):
+        if self.document is None or self.read_only:
+            return
+        self.document.insert_lines(line_no, [""])
+        self.structure_changed(line_no, 1)
+        self.edit_line(line_no)
+
+    def delete_line(self, line_no):
+        if self.document is None or self.read_only or not 0 <= line_no < self.line_count():
+            return
+        self.document.delete_lines(line_no)
+        self.structure_changed(line_no, -1)
+        self.set_current_line(line_no)
+
+    def structure_changed(self, line_no, delta):
+        self._tokens.clear()  # cached by line number, which just shifted
+        self.update_scrollbars()
+        self.lines_changed.emit(line_no, delta)
+
+    def edit_line(self, line_no):
+        if self.document is None or self.read_only or not 0 <= line_no < self.line_count():
+            return
+        self.set_current_line(line_no)
+        row = line_no - self.first_visible_line()
+        gutter = self.gutter_width()
+        self._edit_line = line_no
+        self.line_editor.setGeometry(gutter, row * self.line_height(),
+                                     self.viewport().width() - gutter, self.line_height())
+        self.line_editor.setText(self.document.line(line_no))
+        self.line_editor.show()
+        self.line_editor.setFocus()
+
+    def commit_edit(self):
+        if self._edit_line is None:
+            return
+        line_no, self._edit_line = self._edit_line, None
+        self.line_editor.hide()
+        if self.document is not None:
+            self.document.set_line(line_no, self.line_editor.text())
+            self._tokens.pop(line_no, None)
+            self.line_edited.emit(line_no)
+        self.setFocus()
+        self.viewport().update()
 
 class GCodeViewer(QWidget):
     def __init__(self):
@@ -26,7 +358,16 @@ class GCodeViewer(QWidget):
         self.resize(900, 600)
         self.current_file = None  # Track current file path
         self.init_ui()
-        self.layer_positions = []
+        self.document = None
+        self.layer_table = []
+        self.layer_spans = []
+        self.search_index = None
+        self.search_results = []
+        self.search_pos = -1
+        self.line_shifts = []  # (line_no, delta) of lines inserted/deleted since loading
+        self.loader_thread = None
+        self._stale_loaders = set()  # cancelled loaders kept alive until they stop
+        self.diff_thread = None
 
     def init_ui(self):
         layout = QHBoxLayout(self)
@@ -40,13 +381,43 @@ class GCodeViewer(QWidget):
         left_panel.addWidget(self.open_btn)
         left_panel.addWidget(self.file_label)
         left_panel.addWidget(self.info_label)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        left_panel.addWidget(self.load_progress)
 
         # Layer dropdown
         self.layer_label = QLabel("Layers:")
         self.layer_combo = QComboBox()
+        # Backed by a string list model filled in one go; uniform item sizes and a
+        # fixed width keep the combo from measuring every layer label
+        self.layer_model = QStringListModel()
+        self.layer_combo.setModel(self.layer_model)
+        self.layer_combo.view().setUniformItemSizes(True)
+        self.layer_combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.layer_combo.setMinimumContentsLength(18)
         self.layer_combo.currentIndexChanged.connect(self.goto_layer)
         left_panel.addWidget(self.layer_label)
         left_panel.addWidget(self.layer_combo)
+        self.z_input = QLineEdit()
+        self.z_input.setPlaceholderText("Go to Z (mm)")
+        self.z_input.returnPressed.connect(self.goto_z)
+        left_panel.addWidget(self.z_input)
+        self.resume_btn = QPushButton("Resume From Layer...")
+        self.resume_btn.clicked.connect(self.resume_from_layer)
+        left_panel.addWidget(self.resume_btn)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search: z=12.4, type:Perimeter, M600 M104")
+        self.search_input.returnPressed.connect(self.search_next)
+        self.search_input.textChanged.connect(self.clear_search)
+        self.search_label = QLabel("")
+        left_panel.addWidget(self.search_input)
+        left_panel.addWidget(self.search_label)
+        self.compare_btn = QPushButton("Compare With...")
+        self.compare_btn.clicked.connect(self.compare_with)
+        self.diff_label = QLabel("")
+        left_panel.addWidget(self.compare_btn)
+        left_panel.addWidget(self.diff_label)
         left_panel.addStretch()
 
         # Save buttons at the bottom
@@ -58,8 +429,9 @@ class GCodeViewer(QWidget):
         left_panel.addWidget(self.saveas_btn)
 
         # Right panel (60%)
-        self.gcode_view = QTextEdit()
-        self.gcode_view.setReadOnly(False)  # Allow editing
+        self.gcode_view = GCodeView()
+        self.gcode_view.line_edited.connect(self.on_line_edited)
+        self.gcode_view.lines_changed.connect(self.on_lines_changed)
 
         # Add to main layout
         layout.addLayout(left_panel, 2)
@@ -67,100 +439,253 @@ class GCodeViewer(QWidget):
 
     def open_gcode(self):
         fname, _ = QFileDialog.getOpenFileName(
-            self, "Open G-code", "", "G-code Files (*.gcode *.txt)"
+            self, "Open G-code", "", "G-code Files (*.gcode *.txt *.gcode.gz *.zip *.bgcode)"
         )
         if fname:
-            self.current_file = fname
-            self.file_label.setText(f"File: {fname.split('/')[-1]}")
-            self.gcode_view.setPlainText("Loading...")
-            self.layer_combo.clear()
-            self.layer_combo.setEnabled(False)
-            self.info_label.setText("Print time: \nFilament used: ")
-            self.loader_thread = GCodeLoader(fname)
-            self.loader_thread.loaded.connect(self.on_gcode_loaded)
-            self.loader_thread.start()
-
-    def on_gcode_loaded(self, gcode):
-        self.gcode_view.setPlainText(gcode)
-        self.update_info(gcode)
-        self.populate_layers(gcode)
-
-    def update_info(self, gcode):
-        # Simple parsing for print time and filament used (look for comments)
-        time_match = re.search(r';\s*TIME:\s*(\d+)', gcode)
-        filament_match = re.search(r';\s*Filament used:\s*([\d\.]+)\s*m', gcode)
-        time_str = f"{int(time_match.group(1)) // 60} min" if time_match else "Unknown"
-        filament_str = f"{filament_match.group(1)} m" if filament_match else "Unknown"
+            self.load_file(fname)
+
+    def load_file(self, fname):
+        self.current_file = fname
+        self.file_label.setText(f"File: {fname.split('/')[-1]}")
+        self.cancel_loading()
+        self.close_document()
+        self.layer_table = []
+        self.layer_spans = []
+        self.search_index = None
+        self.line_shifts = []
+        self.clear_search()
+        self.layer_model.setStringList([])
+        self.layer_combo.setEnabled(False)
+        self.info_label.setText("Print time: \nFilament used: ")
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.loader_thread = GCodeLoader(fname)
+        self.loader_thread.opened.connect(self.on_document_opened)
+        self.loader_thread.progress.connect(self.on_load_progress)
+        self.loader_thread.loaded.connect(self.on_gcode_loaded)
+        self.loader_thread.failed.connect(self.on_load_failed)
+        self.loader_thread.start()
+
+    def cancel_loading(self):
+        loader = self.loader_thread
+        if loader is None or not loader.isRunning():
+            return
+        # Late signals from the old file must not reach the view
+        loader.opened.disconnect()
+        loader.progress.disconnect()
+        loader.loaded.disconnect()
+        loader.failed.disconnect()
+        loader.requestInterruption()
+        self._stale_loaders.add(loader)
+        loader.finished.connect(lambda: self._stale_loaders.discard(loader))
+        self.loader_thread = None
+
+    def close_document(self):
+        self.gcode_view.set_document(None)
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+
+    def on_document_opened(self, document):
+        self.document = document
+        self.gcode_view.set_document(document)
+
+    def on_load_progress(self, percent):
+        self.load_progress.setValue(percent)
+        self.gcode_view.update_scrollbars()  # more lines indexed
+
+    def on_load_failed(self, error):
+        self.load_progress.hide()
+        self.file_label.setText(f"Could not open {self.current_file.split('/')[-1]}: {error}")
+
+    def on_gcode_loaded(self, layer_table, metadata, search_index):
+        self.load_progress.hide()
+        self.gcode_view.update_scrollbars()
+        self.gcode_view.read_only = False
+        self.layer_table = layer_table
+        self.search_index = search_index
+        self.update_info(metadata)
+        self.populate_layers()
+
+    def on_line_edited(self, line_no):
+        if self.document is not None and self.document.modified:
+            self.file_label.setText(f"File: {self.current_file.split('/')[-1]} (modified)")
+
+    def on_lines_changed(self, line_no, delta):
+        # Layers after the edit move with it; the table is rebuilt on save
+        self.layer_spans = [
+            (self.shift(first, line_no, delta), self.shift(end, line_no, delta))
+            for first, end in self.layer_spans
+        ]
+        self.line_shifts.append((line_no, delta))
+        self.on_line_edited(line_no)
+
+    @staticmethod
+    def shift(line_no, changed, delta):
+        """line_no after delta lines were inserted (> 0) or deleted (< 0) at changed.
+        An insertion pushes the line that was at changed down, a deletion removes it."""
+        if line_no > changed or delta > 0 and line_no == changed:
+            return line_no + delta
+        return line_no
+
+    def shifted_line(self, line_no):
+        """Line number in the edited document of a line of the file on disk."""
+        for changed, delta in self.line_shifts:
+            line_no = self.shift(line_no, changed, delta)
+        return line_no
+
+    def clear_search(self):
+        self.search_results = []
+        self.search_pos = -1
+        self.search_label.setText("")
+
+    def search_next(self):
+        """Run the query on the first Enter, step through its results on the next ones."""
+        if self.search_index is None:
+            return
+        if not self.search_results:
+            try:
+                self.search_results = self.search_index.query(self.search_input.text())
+            except ValueError:
+                self.search_label.setText("Invalid query")
+                return
+            if not self.search_results:
+                self.search_label.setText("No matches")
+                return
+        self.search_pos = (self.search_pos + 1) % len(self.search_results)
+        first, end = self.search_results[self.search_pos]
+        first, end = self.shifted_line(first), self.shifted_line(end)
+        self.gcode_view.set_current_line(first)
+        self.gcode_view.set_highlight(first, max(first, end - 1))
+        self.search_label.setText(f"{self.search_pos + 1} of {len(self.search_results)}")
+
+    def compare_with(self):
+        """Diff the file on disk against another slice; Enter in the search box
+        then steps through the changed layers."""
+        if not self.current_file or self.diff_thread is not None and self.diff_thread.isRunning():
+            return
+        fname, _ = QFileDialog.getOpenFileName(
+            self, "Compare With", os.path.dirname(self.current_file),
+            "G-code Files (*.gcode *.txt *.gcode.gz *.zip *.bgcode)"
+        )
+        if not fname:
+            return
+        self.diff_label.setText("Comparing...")
+        self.diff_thread = DiffWorker(self.current_file, fname)
+        self.diff_thread.finished_diff.connect(self.on_diff_finished)
+        self.diff_thread.failed.connect(lambda error: self.diff_label.setText(f"Compare failed: {error}"))
+        self.diff_thread.start()
+
+    def on_diff_finished(self, report):
+        time_a, time_b = report["time"]
+        grams_a, grams_b = report["filament_g"]
+        changes = [c for c in report["changes"] if c.line_a is not None]
+        self.diff_label.setText(
+            f"{len(report['changes'])} layers differ\n"
+            f"Time {(time_b - time_a) / 60:+.1f} min, filament {grams_b - grams_a:+.2f} g"
+        )
+        if not changes:
+            return
+        self.search_input.blockSignals(True)  # keep the results, the text is only a label
+        self.search_input.setText("(differences)")
+        self.search_input.blockSignals(False)
+        self.search_results = [(c.line_a, c.line_a + 1) for c in changes]
+        self.search_pos = -1
+        self.search_next()
+
+    def update_info(self, metadata):
+        # Read by the slicer's dialect (Cura header, PrusaSlicer footer, ...)
+        time_str = f"{metadata['time'] // 60} min" if metadata['time'] else "Unknown"
+        filament_str = metadata['filament'] if metadata['filament'] != "0m" else "Unknown"
         self.info_label.setText(f"Print time: {time_str}\nFilament used: {filament_str}")
 
-    def populate_layers(self, gcode):
-        # Find all layer change comments, but ignore ";Layer height:"
-        self.layer_combo.clear()
-        self.layer_positions = []
-        lines = gcode.splitlines()
-        for idx, line in enumerate(lines):
-            # Ignore lines like ";Layer height: 0.2"
-            if re.match(r';\s*Layer height:', line, re.IGNORECASE):
-                continue
-            # Match actual layer change comments
-            if (
-                re.match(r';\s*LAYER[:\s]', line, re.IGNORECASE)
-                or re.match(r';\s*LAYER_CHANGE', line, re.IGNORECASE)
-                or re.match(r';\s*layer\s', line, re.IGNORECASE)
-            ):
-                self.layer_combo.addItem(f"Layer {len(self.layer_positions)}")
-                pos = self._line_to_position(gcode, idx)
-                self.layer_positions.append(pos)
-        if self.layer_combo.count() == 0:
-            self.layer_combo.addItem("No layers found")
-            self.layer_combo.setEnabled(False)
-        else:
-            self.layer_combo.setEnabled(True)
+    def populate_layers(self):
+        self.layer_spans = layers.layer_spans(self.layer_table, self.gcode_view.line_count())
+        labels = [f"Layer {layer.number}  (Z {layer.z:.2f})" for layer in self.layer_table]
+        self.layer_combo.blockSignals(True)  # no jump while the list is replaced
+        self.layer_model.setStringList(labels or ["No layers found"])
+        self.layer_combo.setCurrentIndex(0)
+        self.layer_combo.blockSignals(False)
+        self.layer_combo.setEnabled(bool(labels))
 
-    def _line_to_position(self, gcode, line_number):
-        # Helper: get character position at start of line_number
-        lines = gcode.splitlines(keepends=True)
-        return sum(len(lines[i]) for i in range(line_number))
+    def goto_z(self):
+        try:
+            z = float(self.z_input.text())
+        except ValueError:
+            return
+        index = layers.layer_at_z(self.layer_table, z)
+        if index is None:
+            return
+        if index == self.layer_combo.currentIndex():
+            self.goto_layer(index)  # no change signal for the same index
+        else:
+            self.layer_combo.setCurrentIndex(index)
 
     def goto_layer(self, index):
-        if not self.layer_positions or index < 0 or index >= len(self.layer_positions):
-            self.gcode_view.setExtraSelections([])  # Clear highlights
+        if not self.layer_table or index < 0 or index >= len(self.layer_table):
+            self.gcode_view.set_highlight(None)  # Clear highlights
             return
-        cursor = self.gcode_view.textCursor()
-        cursor.setPosition(self.layer_positions[index])
-        self.gcode_view.setTextCursor(cursor)
+        # Precomputed line span; the first line is the scroll position
+        line_no, end = self.layer_spans[index]
+        self.gcode_view.set_current_line(line_no)
+        self.gcode_view.set_highlight(line_no)  # Highlight the layer line
+        self.gcode_view.set_layer_range(line_no, end)
         self.gcode_view.setFocus()
 
-        # Highlight the layer line
-        gcode = self.gcode_view.toPlainText()
-        start = self.layer_positions[index]
-        end = gcode.find('\n', start)
-        if end == -1:
-            end = len(gcode)
-        selection = QTextEdit.ExtraSelection()
-        selection.cursor = self.gcode_view.textCursor()
-        selection.cursor.setPosition(start)
-        selection.cursor.setPosition(end, QTextCursor.KeepAnchor)
-        selection.format.setBackground(QColor("#2aa6e9"))  # Light blue
-        self.gcode_view.setExtraSelections([selection])
+    def resume_from_layer(self):
+        index = self.layer_combo.currentIndex()
+        if not self.current_file or not self.layer_table or not 0 <= index < len(self.layer_table):
+            return
+        layer = self.layer_table[index]
+        stem = os.path.splitext(self.current_file)[0]
+        fname, _ = QFileDialog.getSaveFileName(
+            self, "Save Resume G-code", f"{stem}_resume_layer{layer.number}.gcode",
+            "G-code Files (*.gcode *.txt)"
+        )
+        if fname:
+            # Built from the file on disk, unsaved edits are not included
+            try:
+                resume.write_resume(self.current_file, fname, number=layer.number, layers=self.layer_table)
+            except Exception as e:
+                QMessageBox.critical(self, "Resume Error", f"Failed to write resume file:\n{str(e)}")
+                return
+            self.file_label.setText(f"Resume file: {fname.split('/')[-1]} (layer {layer.number})")
 
     def save_gcode(self):
-        if self.current_file:
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                f.write(self.gcode_view.toPlainText())
-            self.file_label.setText(f"Saved: {self.current_file.split('/')[-1]}")
+        # Binary G-code is read-only here, it is saved as plain text instead
+        if self.current_file and not self.current_file.lower().endswith('.bgcode'):
+            self.write_document(self.current_file)
         else:
             self.saveas_gcode()
 
     def saveas_gcode(self):
         fname, _ = QFileDialog.getSaveFileName(
-            self, "Save G-code As", "", "G-code Files (*.gcode *.txt)"
+            self, "Save G-code As", "", "G-code Files (*.gcode *.txt *.gcode.gz *.zip)"
         )
         if fname:
-            with open(fname, 'w', encoding='utf-8') as f:
-                f.write(self.gcode_view.toPlainText())
-            self.current_file = fname
-            self.file_label.setText(f"Saved: {fname.split('/')[-1]}")
+            if fname.lower().endswith('.bgcode'):
+                fname = os.path.splitext(fname)[0] + '.gcode'
+            self.write_document(fname)
+
+    def write_document(self, fname):
+        if self.document is None or self.loader_thread is not None and self.loader_thread.isRunning():
+            return  # nothing loaded, or still indexing
+        self.gcode_view.commit_edit()
+        line_no = self.gcode_view.current_line
+        self.gcode_view.set_document(None)
+        try:
+            self.document.save(fname)  # temp file + rename, closes the document
+        except Exception as e:
+            # The document is still open with its edits, give it back to the view
+            self.gcode_view.set_document(self.document)
+            self.gcode_view.read_only = False
+            self.gcode_view.set_current_line(line_no)
+            QMessageBox.critical(self, "Save Error", f"Failed to save G-code:\n{str(e)}")
+            return
+        self.document = None
+        # Reopen what was written; the layer table is rebuilt for the new mtime
+        self.load_file(fname)
+        self.file_label.setText(f"Saved: {fname.split('/')[-1]}")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
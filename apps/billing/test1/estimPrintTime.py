@@ -1,23 +1,13 @@
-import re
+import os
+import sys
 
-def parse_gcode(file_path):
-    total_time_sec = 0
-    total_extrusion = 0
-
-    with open(file_path, 'r') as file:
-        for line in file:
-            if line.startswith("G1") or line.startswith("G0"):  # Movement commands
-                speed_match = re.search(r'F(\d+)', line)
-                extrusion_match = re.search(r'E([\d.]+)', line)
-
-                if speed_match:
-                    speed = float(speed_match.group(1)) / 60  # Convert mm/min to mm/sec
-                    total_time_sec += 1 / speed  # Approximate time per move
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from gcodetools import estimator, filament, moves
 
-                if extrusion_match:
-                    total_extrusion += float(extrusion_match.group(1))
-
-    total_time_hours = total_time_sec / 3600  # Convert seconds to hours
+def parse_gcode(file_path):
+    table = moves.extract_moves(file_path)
+    total_time_hours = estimator.estimate_table(table) / 3600
+    total_extrusion = filament.filament_usage(table)["length_mm"]
     return total_time_hours, total_extrusion
 
 print_time, material_used = parse_gcode(r"C:\Users\kezin\OneDrive\Documents\business_ideas\EMPTSPACE\Gcode\3DBenchy_1h51m_0.20mm_205C_PLA_ENDER3.gcode")
@@ -16,6 +16,7 @@ fixed: all known bugs
 
 """
 
+import io
 import sys
 import os
 import numpy as np
@@ -25,10 +26,10 @@ import pyqtgraph.opengl as gl
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, 
     QHBoxLayout, QMessageBox, QSplitter, QFileDialog, QTabWidget, 
-    QTextEdit, QGroupBox, QSizePolicy
+    QTextEdit, QGroupBox, QSizePolicy, QComboBox, QSlider, QSpinBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QFont, QPixmap
 import time
 from fpdf import FPDF
 from PyQt5.QtCore import QDateTime
@@ -45,6 +46,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from gcodetools import analysis, dialects, preview, pricing, stats, thumbnails, toolpath, watch
+
 class STLViewer(gl.GLViewWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -81,6 +85,55 @@ class STLViewer(gl.GLViewWidget):
     def reset_camera(self):
         self.setCameraPosition(distance=200, elevation=30, azimuth=45)
 
+class GCodeFolderWatcher(QObject):
+    """Pre-analyzes G-code dropped into a folder so the quote is ready when it is opened.
+
+    QFileSystemWatcher reports folder changes right away; the timer also
+    rescans (in-place overwrites don't always change the folder), submits
+    files that have settled and collects the finished ones.
+    """
+    analyzed = pyqtSignal(str, str)  # path, error message ('' on success)
+
+    def __init__(self, directory, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.prewarmer = watch.FolderPrewarmer(directory)
+        self.watcher = QFileSystemWatcher([directory], self)
+        self.watcher.directoryChanged.connect(self.rescan)
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(watch.POLL_INTERVAL * 1000))
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+        self.rescan()
+
+    def rescan(self):
+        self.prewarmer.scan()
+
+    def poll(self):
+        self.prewarmer.scan()
+        for path, error in self.prewarmer.poll():
+            self.analyzed.emit(path, error or "")
+
+    def stop(self):
+        self.timer.stop()
+        self.watcher.removePath(self.directory)
+        self.prewarmer.shutdown()
+
+class AnalysisLoader(QThread):
+    """Runs the full analysis (parse, time estimate, statistics) off the GUI thread."""
+    loaded = pyqtSignal(str, dict)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            self.loaded.emit(self.file_path, analysis.analyze_cached(self.file_path))
+        except Exception as e:
+            self.failed.emit(self.file_path, str(e))
+
 class GCodeLoaderTab(QWidget):
     pricing_requested = pyqtSignal(dict)
     
@@ -88,6 +141,10 @@ class GCodeLoaderTab(QWidget):
         super().__init__()
         self.init_ui()
         self.metadata = None
+        self.analysis = None
+        self._loaders = set()  # keeps running analyses alive until they finish
+        self.folder_watcher = None
+        self.prepared_count = 0
         
     def init_ui(self):
         layout = QVBoxLayout()
@@ -104,8 +161,22 @@ class GCodeLoaderTab(QWidget):
         browse_button.setStyleSheet("padding: 8px; font-weight: bold;")
         browse_button.setFixedWidth(250)    
         
+        watch_button = QPushButton("Watch Folder...")
+        watch_button.clicked.connect(self.choose_watch_folder)
+        watch_button.setStyleSheet("padding: 8px;")
+        watch_button.setFixedWidth(250)
+        self.watch_label = QLabel("Drop folder: not watched")
+        self.watch_label.setStyleSheet("color: #555;")
+
+        # Part picture embedded by the slicer, read from the header only
+        self.thumbnail_label = QLabel()
+        self.thumbnail_label.hide()
+
         file_layout.addWidget(self.file_label)
+        file_layout.addWidget(self.thumbnail_label)
         file_layout.addWidget(browse_button)
+        file_layout.addWidget(watch_button)
+        file_layout.addWidget(self.watch_label)
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
         
@@ -157,14 +228,58 @@ class GCodeLoaderTab(QWidget):
         layout.addStretch(1)
         self.setLayout(layout)
     
+    def choose_watch_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, "Watch G-code Drop Folder")
+        if directory:
+            self.watch_folder(directory)
+
+    def watch_folder(self, directory):
+        """Analyze everything dropped into directory in the background."""
+        self.stop_watching()
+        self.prepared_count = 0
+        self.folder_watcher = GCodeFolderWatcher(directory, self)
+        self.folder_watcher.analyzed.connect(self.on_file_prepared)
+        self.watch_label.setText(f"Drop folder: {directory}")
+
+    def stop_watching(self):
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+            self.folder_watcher.deleteLater()
+            self.folder_watcher = None
+
+    def on_file_prepared(self, path, error):
+        if error:
+            self.window().status_message.setText(f"Pre-analysis failed for {os.path.basename(path)}")
+            return
+        self.prepared_count += 1
+        self.watch_label.setText(
+            f"Drop folder: {self.folder_watcher.directory} ({self.prepared_count} ready)"
+        )
+
     def browse_gcode(self):
+        start_dir = self.folder_watcher.directory if self.folder_watcher else ""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Open G-code File", "", "G-code Files (*.gcode)"
+            self, "Open G-code File", start_dir, "G-code Files (*.gcode *.gcode.gz *.zip *.bgcode)"
         )
         if file_path:
             self.file_path = file_path
             self.file_label.setText(f"Selected: {os.path.basename(file_path)}")
+            self.show_thumbnail(file_path)
             self.confirm_button.setEnabled(True)
+
+    def show_thumbnail(self, file_path):
+        # The preview is optional: a damaged image or unreadable archive just hides it
+        try:
+            thumbnail = thumbnails.best_thumbnail(file_path)
+            data = thumbnail.data if thumbnail is not None else None
+        except Exception:
+            data = None
+        pixmap = QPixmap()
+        if data is None or not pixmap.loadFromData(data):
+            self.thumbnail_label.hide()
+            return
+        self.thumbnail_label.setPixmap(pixmap.scaledToWidth(min(pixmap.width(), 220), Qt.SmoothTransformation))
+        self.thumbnail_label.show()
     
     def analyze_gcode(self):
         if not hasattr(self, 'file_path'):
@@ -175,63 +290,42 @@ class GCodeLoaderTab(QWidget):
             
         try:
             self.metadata = self.parse_gcode_metadata(self.file_path)
+            self.analysis = None
             self.display_results()
             self.pricing_button.setEnabled(True)
         except Exception as e:
             QMessageBox.critical(self, "Analysis Error", f"Failed to analyze G-code:\n{str(e)}")
+            return
+
+        # Statistics and layers need the whole toolpath; they follow when it is parsed
+        loader = AnalysisLoader(self.file_path)
+        loader.loaded.connect(self.on_analysis_loaded)
+        loader.failed.connect(self.on_analysis_failed)
+        self._loaders.add(loader)
+        loader.finished.connect(lambda: self._loaders.discard(loader))
+        loader.start()
+        self.window().status_message.setText("Analyzing toolpath...")
     
     def parse_gcode_metadata(self, filename):
-        metadata = {
-            "flavor": "Unknown",
-            "time": 0,
-            "filament": "0m",
-            "layer_height": 0.0,
-            "minx": 0.0,
-            "miny": 0.0,
-            "minz": 0.0,
-            "maxx": 0.0,
-            "maxy": 0.0,
-            "maxz": 0.0,
-            "printer": "Unknown",
-            "slicer": "Unknown"
-        }
-
         try:
-            with open(filename, 'r') as file:
-                for line in file:
-                    line = line.strip()
-                    if line.startswith(';FLAVOR:'):
-                        metadata["flavor"] = line.split(':', 1)[1].strip()
-                    elif line.startswith(';TIME:'):
-                        metadata["time"] = int(line.split(':', 1)[1])
-                    elif line.startswith(';Filament used:'):
-                        metadata["filament"] = line.split(':', 1)[1].strip()
-                    elif line.startswith(';Layer height:'):
-                        metadata["layer_height"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MINX:'):
-                        metadata["minx"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MINY:'):
-                        metadata["miny"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MINZ:'):
-                        metadata["minz"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MAXX:'):
-                        metadata["maxx"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MAXY:'):
-                        metadata["maxy"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';MAXZ:'):
-                        metadata["maxz"] = float(line.split(':', 1)[1])
-                    elif line.startswith(';TARGET_MACHINE.NAME:'):
-                        metadata["printer"] = line.split(':', 1)[1].strip()
-                    elif line.startswith(';Generated with'):
-                        metadata["slicer"] = line.split('with', 1)[1].strip()
-
-                    if line.startswith(';LAYER_COUNT') or line.startswith('G1'):
-                        break
-
+            # Only the region the slicer's dialect needs (footer, header, .bgcode blocks)
+            return dialects.read_metadata(filename)
         except Exception as e:
             raise RuntimeError(f"Error parsing G-code: {str(e)}")
 
-        return metadata
+    def on_analysis_loaded(self, file_path, result):
+        if file_path != self.file_path:
+            return  # another file was confirmed meanwhile
+        self.analysis = result
+        # Same slicer figures, plus the bounds and estimate only the parse can give
+        result["metadata"].update({k: v for k, v in self.metadata.items() if k not in result["metadata"]})
+        self.metadata = result["metadata"]
+        self.display_results()
+        self.window().status_message.setText("G-code analysis complete")
+
+    def on_analysis_failed(self, file_path, error):
+        if file_path == self.file_path:
+            self.window().status_message.setText(f"Toolpath analysis failed: {error}")
 
     def display_results(self):
         hours = self.metadata['time'] // 3600
@@ -251,14 +345,23 @@ class GCodeLoaderTab(QWidget):
             f"Printer:        {self.metadata['printer']}\n"
             f"Slicer:         {self.metadata['slicer']}"
         )
+        if self.analysis is None:
+            result_text += "\n\nToolpath Statistics: analyzing..."
+        else:
+            result_text += (
+                f"\nLayers:         {len(self.analysis['layers'])}\n"
+                f"\nToolpath Statistics:\n"
+                f"--------------------\n"
+                f"{stats.format_statistics(self.analysis['statistics'])}"
+            )
         
         self.results_text.setText(result_text)
-        self.window().status_message.setText("G-code analysis complete")
 
     def go_to_pricing(self):
         if self.metadata:
             # Convert time to hours for pricing calculation
             self.metadata["time_hours"] = self.metadata["time"] / 3600.0
+            self.metadata["file"] = self.file_path  # for the part picture on the invoice
             self.pricing_requested.emit(self.metadata)
 
 
@@ -445,7 +548,10 @@ class PricingTab(QWidget):
         self.time_label.setText(f"{hours} hours {minutes} minutes")
         
         # Calculate and display material estimate
-        weight_g = self.calculate_material(metadata['filament'])
+        if metadata.get('filament_g'):
+            weight_g = metadata['filament_g']  # slicer's own figure, uses the real density
+        else:
+            weight_g = self.calculate_material(metadata['filament'])
         # self.material_label.setText(f"Filament: {metadata['filament']} ≈ {weight_g:.1f}g")
         self.material_label.setText(f"Filament: {metadata['filament']} ~ {weight_g:.1f}g")
         # self.material_label.setText(f"Filament: {metadata['filament']} approx. {weight_g:.1f}g")
@@ -460,26 +566,8 @@ class PricingTab(QWidget):
     def calculate_material(self, filament_str):
         """Calculate material weight from filament length string"""
         try:
-            # Extract numerical value from string (e.g., "12.34m" -> 12.34)
-            value_str = ''.join(filter(lambda x: x.isdigit() or x in ['.', ','], filament_str))
-            value = float(value_str.replace(',', '.'))
-            
-            # Check units and convert to meters
-            if "mm" in filament_str.lower():
-                length_m = value / 1000.0  # Convert mm to meters
-            else:
-                length_m = value  # Assume meters if no unit specified
-            
-            # Calculate weight (density: 1.24 g/cm³ for PLA)
-            # Volume = π * r² * length
-            diameter = 1.75  # mm
-            radius_mm = diameter / 2.0
-            volume_mm3 = 3.14159 * radius_mm**2 * (length_m * 1000)  # Convert length to mm
-            volume_cm3 = volume_mm3 / 1000.0
-            weight_g = volume_cm3 * 1.24  # Density
-            
-            return weight_g
-            
+            # 1.75 mm PLA at 1.24 g/cm³
+            return pricing.filament_weight(filament_str)
         except Exception as e:
             print(f"Error calculating material: {e}")
             QMessageBox.warning(self, "Material Calculation Error", 
@@ -500,18 +588,16 @@ class PricingTab(QWidget):
                 time = self.metadata['time_hours']
             else:
                 raise ValueError("No time data available")
-            
-            
-            # Constants
-            cost_per_gram = 0.7
-            power_usage_kw = 0.12
 
-            # Calculations
-            material_cost = weight * cost_per_gram
-            electricity_cost = power_usage_kw * time * electricity_rate
-            machine_cost = machine_rate * time
-            total_cost = material_cost + electricity_cost + machine_cost + post
-            final_price = total_cost * (1 + profit / 100)
+            price = pricing.compute_price(
+                weight, time, post=post, profit=profit,
+                electricity_rate=electricity_rate, machine_rate=machine_rate
+            )
+            material_cost = price["material_cost"]
+            electricity_cost = price["electricity_cost"]
+            machine_cost = price["machine_cost"]
+            total_cost = price["total_cost"]
+            final_price = price["final_price"]
 
             # Store final price for invoice
             self.final_price = final_price
@@ -723,6 +809,18 @@ class PricingTab(QWidget):
             
             # Print details
             story.append(Paragraph("Print Details", styles['InvoiceHeading']))
+            thumbnail = data = None
+            if self.metadata and self.metadata.get("file"):
+                try:
+                    thumbnail = thumbnails.best_thumbnail(self.metadata["file"])
+                    data = thumbnail.data if thumbnail is not None else None
+                except Exception:
+                    data = None
+            if data and thumbnail.width and thumbnail.height:
+                width = min(thumbnail.width, 160)
+                story.append(Image(io.BytesIO(data), width=width,
+                                   height=width * thumbnail.height / thumbnail.width))
+                story.append(Spacer(1, 5))
             print_details = self.print_details_label.text().split('\n')
             for detail in print_details:
                 if detail:  # Skip empty lines
@@ -863,6 +961,177 @@ class STLViewerTab(QWidget):
             self.size_label.setText(f"Size: {os.path.getsize(file_path)/1024:.2f} KB")
             self.viewer.load_stl(file_path)
 
+class ToolpathLoader(QThread):
+    """Loads the move table off the GUI thread (memory-mapped after the first parse)."""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            buffers = preview.ToolpathBuffers(toolpath.load_toolpath(self.file_path).moves)
+            buffers.colors()  # build the full-detail level here, not on the GUI thread
+            self.loaded.emit(buffers)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ToolpathViewer(gl.GLViewWidget):
+    """G-code toolpath as GL lines.
+
+    Two line items only: the top DETAIL_LAYERS of the visible range at full
+    detail and everything below it decimated (DISTANT_LOD). Both are slices
+    of prebuilt per-layer buffers, so changing the range re-uploads just the
+    visible vertices.
+    """
+    DETAIL_LAYERS = 20
+    DISTANT_LOD = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setBackgroundColor('k')
+        self.buffers = None
+        self.color_by = preview.COLOR_BY_FEATURE
+        self.detail_item = gl.GLLinePlotItem(mode='lines', width=1, antialias=False)
+        self.distant_item = gl.GLLinePlotItem(mode='lines', width=1, antialias=False)
+        self.addItem(self.distant_item)
+        self.addItem(self.detail_item)
+        self.detail_item.setVisible(False)
+        self.distant_item.setVisible(False)
+        self.reset_camera()
+
+    def set_buffers(self, buffers):
+        self.buffers = buffers
+        self.reset_camera()
+
+    def show_layers(self, first, last):
+        if self.buffers is None:
+            return
+        detail_first = max(first, last - self.DETAIL_LAYERS + 1)
+        self._set_item(self.detail_item, self.buffers.layer_range(
+            detail_first, last, 1, self.color_by))
+        self._set_item(self.distant_item, self.buffers.layer_range(
+            first, detail_first - 1, self.DISTANT_LOD, self.color_by))
+
+    @staticmethod
+    def _set_item(item, data):
+        vertices, colors = data
+        if len(vertices):
+            item.setData(pos=vertices, color=colors)
+        item.setVisible(bool(len(vertices)))
+
+    def reset_camera(self):
+        box = self.buffers.table.bounding_box() if self.buffers is not None else None
+        if box is None:
+            self.setCameraPosition(distance=200, elevation=30, azimuth=45)
+            return
+        (minx, miny, minz), (maxx, maxy, maxz) = box
+        self.opts['center'] = pg.Vector((minx + maxx) / 2, (miny + maxy) / 2, (minz + maxz) / 2)
+        size = max(maxx - minx, maxy - miny, maxz - minz, 10)
+        self.setCameraPosition(distance=size * 2, elevation=30, azimuth=45)
+
+class ToolpathViewerTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.file_path = None
+        self.loader = None
+        self._loaders = set()  # keeps running loaders alive until they finish
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        header_layout = QHBoxLayout()
+        title = QLabel("Toolpath Preview")
+        title.setStyleSheet("font-size: 16pt; font-weight: bold; color: #333;")
+        header_layout.addWidget(title)
+        header_layout.addStretch()
+        self.load_button = QPushButton("Load G-code File")
+        self.load_button.clicked.connect(self.browse_gcode)
+        self.load_button.setStyleSheet("padding: 8px; font-weight: bold;")
+        header_layout.addWidget(self.load_button)
+        layout.addLayout(header_layout)
+
+        controls = QHBoxLayout()
+        self.file_label = QLabel("No G-code file loaded")
+        self.file_label.setStyleSheet("font-weight: bold;")
+        controls.addWidget(self.file_label)
+        controls.addStretch()
+        controls.addWidget(QLabel("Color by:"))
+        self.color_combo = QComboBox()
+        self.color_combo.addItem("Feature type", preview.COLOR_BY_FEATURE)
+        self.color_combo.addItem("Speed", preview.COLOR_BY_SPEED)
+        self.color_combo.currentIndexChanged.connect(self.update_view)
+        controls.addWidget(self.color_combo)
+        controls.addWidget(QLabel("Layers from:"))
+        self.first_layer = QSpinBox()
+        self.first_layer.valueChanged.connect(self.update_view)
+        controls.addWidget(self.first_layer)
+        controls.addWidget(QLabel("to:"))
+        self.last_layer = QSlider(Qt.Horizontal)
+        self.last_layer.setMinimumWidth(200)
+        self.last_layer.valueChanged.connect(self.update_view)
+        controls.addWidget(self.last_layer)
+        self.layer_label = QLabel("-")
+        controls.addWidget(self.layer_label)
+        layout.addLayout(controls)
+
+        self.viewer = ToolpathViewer()
+        self.viewer.setMinimumSize(600, 400)
+        layout.addWidget(self.viewer, 1)
+        self.setLayout(layout)
+
+    def browse_gcode(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open G-code File", "", "G-code Files (*.gcode *.gcode.gz *.zip *.bgcode)"
+        )
+        if file_path:
+            self.load_gcode(file_path)
+
+    def load_gcode(self, file_path):
+        if file_path == self.file_path:
+            return
+        self.file_path = file_path
+        self.file_label.setText(f"Loading {os.path.basename(file_path)}...")
+        loader = self.loader = ToolpathLoader(file_path)
+        loader.loaded.connect(self.on_loaded)
+        loader.failed.connect(self.on_failed)
+        self._loaders.add(loader)
+        loader.finished.connect(lambda: self._loaders.discard(loader))
+        loader.start()
+
+    def on_loaded(self, buffers):
+        if self.sender() is not self.loader:
+            return  # an older file finished after a newer one was requested
+        self.file_label.setText(
+            f"File: {os.path.basename(self.file_path)} ({len(buffers.table)} moves)"
+        )
+        self.viewer.set_buffers(buffers)
+        top = max(buffers.layer_count - 1, 0)
+        for widget in (self.first_layer, self.last_layer):
+            widget.blockSignals(True)
+            widget.setRange(0, top)
+        self.first_layer.setValue(0)
+        self.last_layer.setValue(top)
+        for widget in (self.first_layer, self.last_layer):
+            widget.blockSignals(False)
+        self.update_view()
+
+    def on_failed(self, message):
+        if self.sender() is not self.loader:
+            return
+        self.file_label.setText("No G-code file loaded")
+        self.file_path = None
+        QMessageBox.critical(self, "Toolpath Error", f"Error loading G-code toolpath:\n{message}")
+
+    def update_view(self):
+        first, last = self.first_layer.value(), self.last_layer.value()
+        self.layer_label.setText(f"{last}")
+        self.viewer.color_by = self.color_combo.currentData()
+        self.viewer.show_layers(first, max(first, last))
+
 class MainApp(QWidget):
     def __init__(self):
         super().__init__()
@@ -900,11 +1169,13 @@ class MainApp(QWidget):
         self.tab1 = GCodeLoaderTab()
         self.tab2 = PricingTab()
         self.tab3 = STLViewerTab()
+        self.tab4 = ToolpathViewerTab()
         
         # Add tabs to tab widget
         self.tabs.addTab(self.tab1, "G-code Loader")
         self.tabs.addTab(self.tab2, "Pricing Calculator")
         self.tabs.addTab(self.tab3, "STL Viewer")
+        self.tabs.addTab(self.tab4, "Toolpath Preview")
         
         
         # Connect signals
@@ -912,6 +1183,7 @@ class MainApp(QWidget):
         self.tab2.stl_view_requested.connect(self.handle_stl_view_request)
         self.tab3.back_button.clicked.connect(lambda: self.tabs.setCurrentIndex(1))
         self.tab2.back_button.clicked.connect(lambda: self.tabs.setCurrentIndex(0))
+        self.tabs.currentChanged.connect(self.handle_tab_changed)
         
         self.status_bar = QStatusBar()
         self.status_bar.setStyleSheet("""
@@ -944,6 +1216,15 @@ class MainApp(QWidget):
     def handle_stl_view_request(self):
         self.tabs.setCurrentIndex(2)  # Switch to STL Viewer tab
 
+    def closeEvent(self, event):
+        self.tab1.stop_watching()  # don't wait for analyses nobody will look at
+        super().closeEvent(event)
+
+    def handle_tab_changed(self, index):
+        # The preview follows the file picked in the G-code Loader tab
+        if self.tabs.widget(index) is self.tab4 and hasattr(self.tab1, 'file_path'):
+            self.tab4.load_gcode(self.tab1.file_path)
+
 if __name__ == "__main__":
     pg.setConfigOption('background', 'k')
     pg.setConfigOption('foreground', 'w')
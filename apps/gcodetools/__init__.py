@@ -0,0 +1,6 @@
+"""
+gcodetools - shared G-code analysis helpers for the EMPTspace apps
+
+The billing studio, the G-code editor and the small estimation scripts all
+import from here instead of carrying their own copy of the parsing code.
+"""
@@ -0,0 +1,85 @@
+"""
+Everything the apps want to know about one G-code file, from one pass.
+
+analyze() always parses; analyze_cached() first looks in the JSON result
+cache and then in the binary toolpath cache, so only a never-seen file is
+parsed as text.
+"""
+
+from .cache import AnalysisCache
+from .estimator import estimate_table, move_times
+from .filament import filament_usage
+from .dialects import read_metadata
+from .layers import Layer
+from .stats import toolpath_statistics
+from .toolpath import load_toolpath, parse_toolpath, store_toolpath
+
+_default_cache = None
+
+
+def analyze(filename, toolpath=None):
+    """Metadata, layer table, kinematic time estimate, filament usage and
+    toolpath statistics."""
+    if toolpath is None:
+        toolpath = parse_toolpath(filename)
+    moves = toolpath.moves
+    # Each slicer stores its estimates somewhere else, the dialect knows where
+    metadata = read_metadata(filename)
+    times = move_times(moves)  # planned once, for the estimate and the per-layer times
+    estimate = {"time": round(estimate_table(moves, times)), "moves": len(moves)}
+    if not metadata["time"]:
+        # No slicer estimate in the file, quote from our own
+        metadata["time"] = estimate["time"]
+    usage = filament_usage(moves)
+    if metadata["filament"] == "0m":
+        metadata["filament"] = f"{usage['length_m']:.2f}m"
+        metadata["filament_g"] = round(usage["weight_g"], 2)
+    _fill_bounds(metadata, moves)
+    return {"metadata": metadata, "layers": toolpath.layers, "estimate": estimate, "filament": usage,
+            "statistics": toolpath_statistics(moves, times)}
+
+
+def _fill_bounds(metadata, moves):
+    """Bounds the slicer did not write (e.g. Z for PrusaSlicer) from the printed moves."""
+    box = moves.bounding_box()
+    if box is None:
+        return
+    for axis, low, high in zip('xyz', *box):
+        if not metadata["min" + axis] and not metadata["max" + axis]:
+            metadata["min" + axis] = round(low, 3)
+            metadata["max" + axis] = round(high, 3)
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnalysisCache()
+    return _default_cache
+
+
+def analyze_cached(filename, cache=None):
+    """analyze(), served from the on-disk cache when the file was seen before."""
+    cache = cache or default_cache()
+    result = cache.get(filename)
+    if result is not None:
+        result["layers"] = [Layer(*row) for row in result["layers"]]
+        return result
+
+    result = analyze(filename, load_toolpath(filename))
+    try:
+        cache.put(filename, result)
+    except OSError:
+        pass  # no writable cache dir, still return the analysis
+    return result
+
+
+def carry_cache(source, target, cache=None):
+    """Cache source's analysis and toolpath under target, a file with the same
+    G-code (e.g. its compressed copy), so target is never parsed."""
+    cache = cache or default_cache()
+    result = analyze_cached(source, cache)
+    try:
+        cache.put(target, result)
+    except OSError:
+        pass
+    store_toolpath(target, load_toolpath(source))
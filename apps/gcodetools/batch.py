@@ -0,0 +1,166 @@
+"""
+Headless batch analyzer.
+
+Analyzes every G-code file in the given directories / globs in parallel on a
+process pool and writes one row per file (metadata, time, filament weight,
+toolpath statistics and price) as CSV or JSON; JSON rows also carry the time
+of every layer. Results also land in the analysis cache, so a second
+run after a rate change only recomputes prices.
+
+    cd apps
+    python -m gcodetools.batch ../Gcode --format csv -o quotes.csv
+    python -m gcodetools.batch "../Gcode/*Benchy*.gcode" --machine-rate 60
+
+.gcode.gz, .zip and Prusa .bgcode files are read as they are. --compress gzips every plain
+.gcode after quoting it and moves its cached analysis to the .gz, so the
+archive stays compressed and later quotes still come from the cache.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from . import analysis, compressed, pricing
+
+GCODE_EXTENSIONS = ('.gcode', '.gcode.gz', '.zip', '.bgcode')
+
+FIELDS = [
+    "file", "slicer", "printer", "time_s", "time", "filament", "filament_g",
+    "layers", "retractions", "z_hops", "extrusion_m", "travel_m", "avg_print_speed",
+    "max_print_speed", "avg_travel_speed", "max_travel_speed", "material_cost", "electricity_cost", "machine_cost", "post",
+    "total_cost", "final_price", "error",
+]
+
+
+def collect_files(sources, recursive=False):
+    """Expand directories and glob patterns into a sorted list of G-code files."""
+    files = set()
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = os.path.join(source, '**', '*') if recursive else os.path.join(source, '*')
+            matches = glob.glob(pattern, recursive=recursive)
+        else:
+            matches = glob.glob(source, recursive=recursive)
+        files.update(
+            m for m in matches
+            if os.path.isfile(m) and m.lower().endswith(GCODE_EXTENSIONS)
+        )
+    return sorted(files)
+
+
+def format_duration(seconds):
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m {seconds % 60}s"
+
+
+def quote_file(filename, rates=None, use_cache=True):
+    """Analyze one file and price it. Never raises, errors go in the row."""
+    row = {"file": filename}
+    try:
+        result = analysis.analyze_cached(filename) if use_cache else analysis.analyze(filename)
+        metadata = result["metadata"]
+        weight = metadata.get("filament_g") or pricing.filament_weight(metadata["filament"])
+        row.update({
+            "slicer": metadata["slicer"],
+            "printer": metadata["printer"],
+            "time_s": metadata["time"],
+            "time": format_duration(metadata["time"]),
+            "filament": metadata["filament"],
+            "filament_g": round(weight, 2),
+            "layers": len(result["layers"]),
+        })
+        statistics = result["statistics"]
+        row.update({
+            "retractions": statistics["retractions"],
+            "z_hops": statistics["z_hops"],
+            "extrusion_m": round(statistics["extrusion_mm"] / 1000, 2),
+            "travel_m": round(statistics["travel_mm"] / 1000, 2),
+            "avg_print_speed": round(statistics["avg_print_speed"], 1),
+            "max_print_speed": round(statistics["max_print_speed"], 1),
+            "avg_travel_speed": round(statistics["avg_travel_speed"], 1),
+            "max_travel_speed": round(statistics["max_travel_speed"], 1),
+            "layer_times": statistics["layer_times"],  # JSON only, too wide for the CSV
+        })
+        price = pricing.compute_price(weight, metadata["time"] / 3600.0, **(rates or {}))
+        row.update({key: round(value, 2) for key, value in price.items()})
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def _quote_args(args):
+    return quote_file(*args)
+
+
+def quote_files(files, rates=None, use_cache=True, jobs=None):
+    """Rows for all files, in the same order, using a process pool."""
+    if jobs == 1 or len(files) < 2:
+        return [quote_file(f, rates, use_cache) for f in files]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        work = [(f, rates, use_cache) for f in files]
+        return list(pool.map(_quote_args, work, chunksize=1))
+
+
+def compress_file(filename):
+    """gzip filename in place (-> filename.gz), carrying its cache entries over."""
+    target = compressed.compress_file(filename, remove=False)
+    analysis.carry_cache(filename, target)
+    os.unlink(filename)
+    return target
+
+
+def write_rows(rows, out, fmt):
+    if fmt == 'json':
+        json.dump(rows, out, indent=2)
+        out.write('\n')
+    else:
+        writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze and price G-code files in bulk")
+    parser.add_argument('sources', nargs='+', help="G-code files, directories or glob patterns")
+    parser.add_argument('-r', '--recursive', action='store_true', help="descend into subdirectories")
+    parser.add_argument('-f', '--format', choices=('csv', 'json'), default='csv')
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true', help="always re-parse, don't touch the cache")
+    parser.add_argument('--compress', action='store_true',
+                        help="gzip plain .gcode files after quoting them, keeping their cache entries")
+    parser.add_argument('--post', type=float, default=pricing.DEFAULT_RATES["post"])
+    parser.add_argument('--profit', type=float, default=pricing.DEFAULT_RATES["profit"])
+    parser.add_argument('--electricity-rate', type=float, default=pricing.DEFAULT_RATES["electricity_rate"])
+    parser.add_argument('--machine-rate', type=float, default=pricing.DEFAULT_RATES["machine_rate"])
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.sources, args.recursive)
+    if not files:
+        parser.error("no G-code files found")
+
+    rates = {
+        "post": args.post,
+        "profit": args.profit,
+        "electricity_rate": args.electricity_rate,
+        "machine_rate": args.machine_rate,
+    }
+    rows = quote_files(files, rates, use_cache=not args.no_cache, jobs=args.jobs)
+    if args.compress:
+        for row in rows:
+            if "error" not in row and not compressed.is_compressed(row["file"]):
+                row["file"] = compress_file(row["file"])
+
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as out:
+            write_rows(rows, out, args.format)
+    else:
+        write_rows(rows, sys.stdout, args.format)
+    return 1 if any("error" in row for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+Prusa binary G-code (.bgcode) reader.
+
+A bgcode file is a 10-byte file header followed by blocks:
+
+    file header   magic 'GCDE' | version (u32) | checksum type (u16)
+    block         type (u16) | compression (u16) | uncompressed size (u32)
+                  | compressed size (u32, only when compressed)
+                  | parameters | payload | CRC32 (when the file has checksums)
+
+Metadata blocks (file, printer, print, slicer) come first as "key=value"
+lines, then thumbnails, then the G-code split into blocks, each deflate or
+heatshrink compressed and optionally MeatPack encoded.
+
+BGCodeFile walks the block headers only, so the metadata is usually in the
+first read of the file and the toolpath is never touched for a quote.
+G-code blocks are decoded one at a time when read_block() or open_gcode()
+asks for them.
+"""
+
+import io
+import struct
+import zlib
+from collections import namedtuple
+
+MAGIC = b'GCDE'
+FILE_HEADER = struct.Struct('<4sIH')
+HEAD_READ = 64 * 1024  # first read, normally covers every metadata block
+
+BLOCK_FILE_METADATA = 0
+BLOCK_GCODE = 1
+BLOCK_SLICER_METADATA = 2
+BLOCK_PRINTER_METADATA = 3
+BLOCK_PRINT_METADATA = 4
+BLOCK_THUMBNAIL = 5
+
+COMPRESSION_NONE = 0
+COMPRESSION_DEFLATE = 1
+COMPRESSION_HEATSHRINK_11_4 = 2
+COMPRESSION_HEATSHRINK_12_4 = 3
+
+ENCODING_MEATPACK = 1
+ENCODING_MEATPACK_COMMENTS = 2
+
+THUMBNAIL_FORMATS = {0: 'PNG', 1: 'JPG', 2: 'QOI'}
+
+CHECKSUM_CRC32 = 1
+
+# type, compression, sizes, parameters (tuple), header offset, payload offset, payload size
+Block = namedtuple(
+    "Block", "type compression uncompressed_size compressed_size params offset data_offset data_size"
+)
+
+
+def is_bgcode(filename):
+    with open(filename, 'rb') as f:
+        return f.read(4) == MAGIC
+
+
+class BGCodeFile:
+    def __init__(self, filename, verify=False):
+        self.filename = filename
+        self.verify = verify
+        self._file = open(filename, 'rb')
+        self._head = self._file.read(HEAD_READ)
+        try:
+            magic, self.version, self.checksum_type = FILE_HEADER.unpack_from(self._head)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"not a binary G-code file: {filename}")
+        self._blocks = []
+        self._next_offset = FILE_HEADER.size
+        self._complete = False
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, offset, size):
+        """Bytes at offset, from the head buffer when they are in it."""
+        if offset + size <= len(self._head):
+            return self._head[offset:offset + size]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _read_block_header(self, offset):
+        raw = self._read(offset, 12)
+        if len(raw) < 8:
+            return None
+        block_type, compression, uncompressed = struct.unpack_from('<HHI', raw)
+        pos = offset + 8
+        compressed = uncompressed
+        if compression != COMPRESSION_NONE:
+            (compressed,) = struct.unpack_from('<I', raw, 8)
+            pos += 4
+        param_size = 6 if block_type == BLOCK_THUMBNAIL else 2
+        params = struct.unpack('<' + 'H' * (param_size // 2), self._read(pos, param_size))
+        data_offset = pos + param_size
+        return Block(block_type, compression, uncompressed, compressed, params,
+                     offset, data_offset, compressed)
+
+    def _walk(self, stop=None):
+        """Extend the block directory, until a block of type stop when given."""
+        while not self._complete:
+            block = self._read_block_header(self._next_offset)
+            if block is None:
+                self._complete = True
+                break
+            self._blocks.append(block)
+            self._next_offset = block.data_offset + block.data_size
+            if self.checksum_type == CHECKSUM_CRC32:
+                self._next_offset += 4
+            if block.type == stop:
+                break
+
+    def blocks(self):
+        """Every block of the file (walks the whole directory)."""
+        self._walk()
+        return list(self._blocks)
+
+    def metadata_blocks(self):
+        """The blocks before the first G-code block (metadata and thumbnails)."""
+        if not any(b.type == BLOCK_GCODE for b in self._blocks):
+            self._walk(stop=BLOCK_GCODE)
+        return [b for b in self._blocks if b.type != BLOCK_GCODE]
+
+    def gcode_blocks(self):
+        """G-code blocks in file order, walking the directory as they are asked for."""
+        index = 0
+        while True:
+            if index == len(self._blocks):
+                if self._complete:
+                    return
+                self._walk(stop=BLOCK_GCODE)
+                continue
+            block = self._blocks[index]
+            index += 1
+            if block.type == BLOCK_GCODE:
+                yield block
+
+    def payload(self, block):
+        """Decompressed payload of block (checksum verified when asked to)."""
+        data = self._read(block.data_offset, block.data_size)
+        if self.verify and self.checksum_type == CHECKSUM_CRC32:
+            header = self._read(block.offset, block.data_offset - block.offset)
+            (expected,) = struct.unpack('<I', self._read(block.data_offset + block.data_size, 4))
+            if zlib.crc32(data, zlib.crc32(header)) != expected:
+                raise ValueError(f"checksum mismatch in block at offset {block.offset}")
+        return decompress(data, block.compression, block.uncompressed_size)
+
+    def read_block(self, block):
+        """Payload of a G-code block as G-code text bytes (MeatPack decoded)."""
+        data = self.payload(block)
+        if block.params[0] in (ENCODING_MEATPACK, ENCODING_MEATPACK_COMMENTS):
+            data = meatpack_decode(data)
+        return data
+
+    def metadata(self, block_type):
+        """The "key=value" pairs of the given metadata block type."""
+        result = {}
+        for block in self.metadata_blocks():
+            if block.type == block_type:
+                for line in self.payload(block).decode('utf-8', 'replace').splitlines():
+                    key, sep, value = line.partition('=')
+                    if sep:
+                        result[key.strip()] = value.strip()
+        return result
+
+    def thumbnails(self):
+        """[(format, width, height, block)] of the embedded previews."""
+        return [
+            (THUMBNAIL_FORMATS.get(b.params[0], str(b.params[0])), b.params[1], b.params[2], b)
+            for b in self.metadata_blocks() if b.type == BLOCK_THUMBNAIL
+        ]
+
+
+class GCodeStream(io.RawIOBase):
+    """Readable stream of the G-code text, decoding one block at a time."""
+
+    def __init__(self, bgcode):
+        self.bgcode = bgcode
+        self._blocks = bgcode.gcode_blocks()
+        self._buffer = b''
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while self._pos >= len(self._buffer):
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._buffer = self.bgcode.read_block(block)
+            self._pos = 0
+        size = min(len(target), len(self._buffer) - self._pos)
+        target[:size] = self._buffer[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def close(self):
+        self.bgcode.close()
+        super().close()
+
+
+def open_gcode_stream(filename):
+    return io.BufferedReader(GCodeStream(BGCodeFile(filename)), 1 << 20)
+
+
+def read_metadata_blocks(filename):
+    """File, printer, print and slicer metadata merged into one dict."""
+    with BGCodeFile(filename) as bgcode:
+        merged = {}
+        for block_type in (BLOCK_SLICER_METADATA, BLOCK_PRINTER_METADATA,
+                           BLOCK_FILE_METADATA, BLOCK_PRINT_METADATA):
+            merged.update(bgcode.metadata(block_type))
+        return merged
+
+
+# Decompression
+
+def decompress(data, compression, size):
+    if compression == COMPRESSION_NONE:
+        return data
+    if compression == COMPRESSION_DEFLATE:
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            return zlib.decompress(data, -15)  # raw deflate stream
+    if compression == COMPRESSION_HEATSHRINK_11_4:
+        return heatshrink_decompress(data, 11, 4, size)
+    if compression == COMPRESSION_HEATSHRINK_12_4:
+        return heatshrink_decompress(data, 12, 4, size)
+    raise ValueError(f"unknown bgcode compression {compression}")
+
+
+def heatshrink_decompress(data, window_bits, lookahead_bits, size=None):
+    """heatshrink (LZSS) stream: tag bit 1 + 8-bit literal, or tag bit 0 +
+    window_bits (offset - 1) + lookahead_bits (count - 1); MSB first."""
+    out = bytearray()
+    bits = 0
+    nbits = 0
+    pos = 0
+    end = len(data)
+    need_literal = 9
+    need_backref = 1 + window_bits + lookahead_bits
+    index_mask = (1 << window_bits) - 1
+    count_mask = (1 << lookahead_bits) - 1
+    while size is None or len(out) < size:
+        # Refill so the longest token fits (or whatever is left)
+        while nbits < need_backref and pos < end:
+            bits = (bits << 8) | data[pos]
+            pos += 1
+            nbits += 8
+        if nbits < 1:
+            break
+        if (bits >> (nbits - 1)) & 1:
+            if nbits < need_literal:
+                break
+            nbits -= need_literal
+            out.append((bits >> nbits) & 0xff)
+        else:
+            if nbits < need_backref:
+                break
+            nbits -= need_backref
+            token = bits >> nbits
+            offset = ((token >> lookahead_bits) & index_mask) + 1
+            count = (token & count_mask) + 1
+            start = len(out) - offset
+            if start < 0:
+                raise ValueError("heatshrink back-reference before the start of the data")
+            if offset >= count:
+                out += out[start:start + count]
+            else:
+                for i in range(count):
+                    out.append(out[start + i])
+        bits &= (1 << nbits) - 1
+    return bytes(out)
+
+
+# MeatPack: two 4-bit codes per byte for the common G-code characters,
+# 0b1111 meaning "a full byte follows"; 0xFF 0xFF + command byte are signals
+
+_MEATPACK_CHARS = b'0123456789. \nGX'
+_MEATPACK_CHARS_NO_SPACES = b'0123456789.E\nGX'
+_SIGNAL = 0xFF
+_COMMAND_ENABLE_PACKING = 0xFB
+_COMMAND_DISABLE_PACKING = 0xFA
+_COMMAND_RESET_ALL = 0xF9
+_COMMAND_ENABLE_NO_SPACES = 0xF7
+_COMMAND_DISABLE_NO_SPACES = 0xF6
+_FULL = 0xF
+
+
+def meatpack_decode(data):
+    out = bytearray()
+    packing = False
+    no_spaces = False
+    table = _MEATPACK_CHARS
+    in_comment = False
+    i = 0
+    n = len(data)
+
+    def emit(c):
+        nonlocal in_comment
+        if c == 0x3B:  # ';'
+            in_comment = True
+        elif c == 0x0A:
+            in_comment = False
+        elif no_spaces and not in_comment and 0x41 <= c <= 0x5A and out and out[-1] not in b' \n':
+            out.append(0x20)  # spaces were stripped, put one back before each word
+        out.append(c)
+
+    while i < n:
+        byte = data[i]
+        if byte == _SIGNAL and i + 1 < n and data[i + 1] == _SIGNAL:
+            command = data[i + 2] if i + 2 < n else None
+            i += 3
+            if command == _COMMAND_ENABLE_PACKING:
+                packing = True
+            elif command == _COMMAND_DISABLE_PACKING:
+                packing = False
+            elif command == _COMMAND_ENABLE_NO_SPACES:
+                no_spaces, table = True, _MEATPACK_CHARS_NO_SPACES
+            elif command == _COMMAND_DISABLE_NO_SPACES:
+                no_spaces, table = False, _MEATPACK_CHARS
+            elif command == _COMMAND_RESET_ALL:
+                packing = no_spaces = False
+                table = _MEATPACK_CHARS
+            continue
+        i += 1
+        if not packing:
+            emit(byte)
+            continue
+        low, high = byte & 0xF, byte >> 4
+        if low == _FULL:
+            first = data[i] if i < n else None
+            i += 1
+        else:
+            first = table[low]
+            if first == 0x0A:
+                # A newline ends the line, the other nibble only pads odd-length lines
+                emit(first)
+                continue
+        if high == _FULL:
+            second = data[i] if i < n else None
+            i += 1
+        else:
+            second = table[high]
+        if first is not None:
+            emit(first)
+        if second is not None:
+            emit(second)
+    return bytes(out)
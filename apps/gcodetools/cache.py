@@ -0,0 +1,111 @@
+"""
+Persistent on-disk cache for G-code analysis results.
+
+Entries are JSON files named after a digest of (absolute path, size, mtime,
+fast content hash). The content hash only reads the first and last 64 KB of
+the file, which is where both Cura (header) and PrusaSlicer (footer + config)
+put everything that changes when a job is re-sliced. Any change to the file
+gives a new key, so stale entries are never returned; they simply age out.
+
+The cache is bounded in total bytes and evicts least recently used entries
+(a hit touches the entry's mtime).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.emptspace', 'gcode-cache')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_VERSION = 8
+SAMPLE_SIZE = 64 * 1024
+
+
+def content_hash(filename, sample_size=SAMPLE_SIZE):
+    """blake2b over the size plus the first and last sample_size bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        digest.update(str(size).encode())
+        f.seek(0)
+        digest.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(size - sample_size, sample_size))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def cache_key(filename):
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    parts = [path, str(stat.st_size), str(stat.st_mtime_ns), content_hash(path)]
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=20).hexdigest()
+
+
+def evict_lru(directory, max_bytes, suffix):
+    """Delete the least recently used files ending in suffix until the total fits."""
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for item in it:
+            if item.name.endswith(suffix) and item.is_file():
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass  # still open/mapped elsewhere (Windows), try next time
+
+
+class AnalysisCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, filename):
+        """Cached result for filename, or None."""
+        try:
+            entry = self._entry_path(cache_key(filename))
+            with open(entry, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return None
+            os.utime(entry)  # mark as recently used
+            return data["result"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, filename, result):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry_path(cache_key(filename))
+        # Write to a temp file and rename so readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "result": result}, f, separators=(',', ':'))
+            os.replace(tmp_path, entry)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        evict_lru(self.directory, self.max_bytes, '.json')
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.unlink(os.path.join(self.directory, name))
@@ -0,0 +1,181 @@
+"""
+Transparent gzip / zip G-code.
+
+open_gcode() returns a binary stream of the G-code text whether the file is
+plain, gzip (.gcode.gz), a zip archive (its first .gcode member) or Prusa
+binary G-code (.bgcode, see bgcode.py), and every reader in the package goes
+through it. Decompression is streamed, so the
+chunked readers keep their bounded memory use on compressed input too.
+Input is recognised by its magic bytes; output (compressed_writer) by the
+target's extension.
+
+Things that need random access (the editor's memory map, the resume
+generator) work on a decompressed spool copy, see spool().
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+from . import bgcode
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+COMPRESSED_EXTENSIONS = ('.gz', '.zip', '.bgcode')
+COPY_CHUNK = 1 << 20
+
+
+def compression(filename):
+    """'gzip', 'zip', 'bgcode' or None for a plain file."""
+    with open(filename, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic == ZIP_MAGIC:
+        return 'zip'
+    if magic == bgcode.MAGIC:
+        return 'bgcode'
+    return None
+
+
+def is_compressed(filename):
+    return compression(filename) is not None
+
+
+def zip_member(archive):
+    """Name of the G-code member of an open ZipFile."""
+    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    for name in names:
+        if name.lower().endswith('.gcode'):
+            return name
+    if len(names) == 1:
+        return names[0]
+    raise ValueError(f"no G-code file in {archive.filename}")
+
+
+class _ZipMemberStream:
+    """The member stream, closing its archive along with it."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.stream = archive.open(zip_member(archive))
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __iter__(self):
+        # Dunder lookups skip __getattr__, so line iteration is forwarded by hand
+        return iter(self.stream)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.stream.close()
+        self.archive.close()
+
+
+def open_gcode(filename):
+    """Binary stream of the (decompressed) G-code text of filename."""
+    kind = compression(filename)
+    if kind == 'gzip':
+        return gzip.open(filename, 'rb')
+    if kind == 'zip':
+        return _ZipMemberStream(zipfile.ZipFile(filename))
+    if kind == 'bgcode':
+        return bgcode.open_gcode_stream(filename)
+    return open(filename, 'rb')
+
+
+def read_tail(filename, size):
+    """Last size bytes of the G-code text, streaming through compressed files."""
+    if not is_compressed(filename):
+        with open(filename, 'rb') as f:
+            f.seek(max(0, os.path.getsize(filename) - size))
+            return f.read()
+    tail = b''
+    with open_gcode(filename) as f:
+        while True:
+            chunk = f.read(COPY_CHUNK)
+            if not chunk:
+                return tail
+            tail = (tail + chunk)[-size:]
+
+
+def inner_name(filename):
+    """'part.gcode.gz' / 'part.zip' / 'part.bgcode' -> 'part.gcode'"""
+    name = os.path.basename(filename)
+    stem, ext = os.path.splitext(name)
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        name = stem
+    return name if name.lower().endswith('.gcode') else name + '.gcode'
+
+
+@contextmanager
+def compressed_writer(file, filename):
+    """Binary stream writing into file, compressed as filename's extension asks."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.gz':
+        with gzip.GzipFile(filename=inner_name(filename), mode='wb', fileobj=file) as out:
+            yield out
+    elif ext == '.zip':
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(inner_name(filename), 'w', force_zip64=True) as out:
+                yield out
+    elif ext == '.bgcode':
+        raise ValueError("writing binary G-code is not supported, save as .gcode")
+    else:
+        yield file
+
+
+def decompress_to(filename, path):
+    with open_gcode(filename) as source, open(path, 'wb') as out:
+        shutil.copyfileobj(source, out, COPY_CHUNK)
+
+
+def make_spool(filename):
+    """Path of a decompressed temp copy of filename; the caller deletes it."""
+    fd, path = tempfile.mkstemp(suffix='.gcode')
+    os.close(fd)
+    try:
+        decompress_to(filename, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+@contextmanager
+def spool(filename):
+    """Plain path for filename: the file itself, or a temp copy while compressed."""
+    if not is_compressed(filename):
+        yield filename
+        return
+    path = make_spool(filename)
+    try:
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def compress_file(filename, extension='.gz', remove=True):
+    """Write filename + extension next to it (atomically); returns the new path."""
+    target = filename + extension
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with compressed_writer(f, target) as out, open(filename, 'rb') as source:
+                shutil.copyfileobj(source, out, COPY_CHUNK)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if remove:
+        os.unlink(filename)
+    return target
@@ -0,0 +1,164 @@
+"""
+Slicer dialect registry.
+
+Each slicer keeps its time / filament / bounds in a different place (Cura in
+the ";KEY:value" header, PrusaSlicer and its forks in the footer, Orca and
+Bambu Studio in a header block, Prusa binary G-code in metadata blocks).
+read_metadata() sniffs the first few KB of
+the file, picks the first registered dialect that recognises it (Generic
+when none does) and lets it read only the region it needs.
+
+New slicers are added with:
+
+    @register
+    class MySlicer(Dialect):
+        name = "MySlicer"
+        def sniff(self, head): ...
+        def read_metadata(self, filename, head): ...
+"""
+
+import re
+
+from . import bgcode
+from .compressed import compression, open_gcode
+from .footer import (
+    footer_metadata, parse_duration, parse_generator, read_generator, read_prusa_metadata
+)
+from .scanner import default_metadata, read_metadata as read_header_metadata
+
+SNIFF_BYTES = 4096
+
+_registry = []
+
+
+def register(dialect_class):
+    """Class decorator adding a dialect to the registry (checked in order)."""
+    _registry.append(dialect_class())
+    return dialect_class
+
+
+def dialects():
+    return list(_registry)
+
+
+def read_head(filename, size=SNIFF_BYTES):
+    with open_gcode(filename) as f:
+        return f.read(size).decode('utf-8', 'replace')
+
+
+class Dialect:
+    name = "Generic"
+
+    def sniff(self, head):
+        return False
+
+    def read_metadata(self, filename, head):
+        """Metadata dict (see scanner.default_metadata) or None."""
+        return None
+
+
+@register
+class PrusaSlicer(Dialect):
+    """PrusaSlicer and forks with the same footer (SuperSlicer, Slic3r PE)."""
+    name = "PrusaSlicer"
+    # Anywhere in the head: an edited file may have lines above it
+    generated_by = re.compile(r'^; generated by (?:PrusaSlicer|SuperSlicer|Slic3r)', re.MULTILINE | re.IGNORECASE)
+
+    def sniff(self, head):
+        return self.generated_by.search(head) is not None
+
+    def read_metadata(self, filename, head):
+        return read_prusa_metadata(filename)
+
+
+@register
+class Cura(Dialect):
+    name = "Cura"
+
+    def sniff(self, head):
+        return ';FLAVOR:' in head or ';Generated with Cura' in head
+
+    def read_metadata(self, filename, head):
+        # Everything is in the header, stops at the first move
+        return read_header_metadata(filename)
+
+
+_HEADER_BLOCK_LINE = re.compile(r'^;\s*([^:=\n]+?)\s*[:=]\s*(.+?)\s*$', re.MULTILINE)
+
+
+@register
+class OrcaSlicer(Dialect):
+    """OrcaSlicer / Bambu Studio: "; HEADER_BLOCK_START" ... "; HEADER_BLOCK_END"."""
+    name = "OrcaSlicer"
+
+    def sniff(self, head):
+        return 'HEADER_BLOCK_START' in head and ('OrcaSlicer' in head or 'BambuStudio' in head)
+
+    def read_metadata(self, filename, head):
+        # Same footer layout as PrusaSlicer, it has the most complete data
+        metadata = read_prusa_metadata(filename)
+        if metadata is not None:
+            return metadata
+
+        block = head.split('HEADER_BLOCK_START', 1)[1].split('HEADER_BLOCK_END', 1)[0]
+        fields = dict(_HEADER_BLOCK_LINE.findall(block))
+        metadata = default_metadata()
+        for key, value in fields.items():
+            key = key.lower()
+            if key.startswith('total estimated time') or key.startswith('model printing time'):
+                metadata["time"] = parse_duration(value)
+            elif key == 'total filament length [mm]':
+                metadata["filament"] = f"{float(value) / 1000:.2f}m"
+            elif key == 'total filament weight [g]':
+                metadata["filament_g"] = float(value)
+            elif key == 'max_z_height':
+                metadata["maxz"] = float(value)
+        metadata["slicer"] = parse_generator(head) or self.name
+        return metadata
+
+
+class Generic(Dialect):
+    """Fallback when no registered dialect matches: a PrusaSlicer footer when the
+    head was cut off (e.g. a resume file), else whatever ";KEY:value" header there is."""
+
+    def read_metadata(self, filename, head):
+        metadata = read_prusa_metadata(filename)
+        if metadata is not None:
+            return metadata
+        metadata = read_header_metadata(filename)
+        generator = read_generator(filename)
+        if generator and metadata["slicer"] == "Unknown":
+            metadata["slicer"] = generator
+        return metadata
+
+
+class BinaryGCode(Dialect):
+    """Prusa .bgcode: the metadata blocks hold the footer keys, no G-code is decoded."""
+    name = "PrusaSlicer binary"
+
+    def read_metadata(self, filename, head):
+        fields = bgcode.read_metadata_blocks(filename)
+        metadata = footer_metadata(fields)
+        metadata["slicer"] = fields.get('Producer', "PrusaSlicer")
+        return metadata
+
+
+def detect(filename):
+    """(dialect, head) for filename."""
+    if compression(filename) == 'bgcode':
+        return BinaryGCode(), ''
+    head = read_head(filename)
+    for dialect in _registry:
+        if dialect.sniff(head):
+            return dialect, head
+    return Generic(), head
+
+
+def read_metadata(filename):
+    """Metadata using the dialect-specific reader for the slicer that wrote filename."""
+    dialect, head = detect(filename)
+    metadata = dialect.read_metadata(filename, head)
+    if metadata is None:
+        metadata = read_header_metadata(filename)
+    metadata.setdefault("dialect", dialect.name)
+    return metadata
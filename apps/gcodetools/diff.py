@@ -0,0 +1,181 @@
+"""
+Layer-aligned diff of two slices of the same model.
+
+Each file is hashed line by line in one streaming pass, then the two layer
+tables are joined on Z (a re-slice with another first layer height still
+lines up) and each pair of layers is compared by a digest of its line
+hashes. Only the layers whose digests differ are walked line by line, to
+find their first differing line, so the whole diff is linear in the size of
+the files. Time and filament come from the (cached) analysis of each file.
+
+Comments are ignored by default: the slicer's date and settings dump would
+otherwise make every re-slice differ.
+
+    cd apps
+    python -m gcodetools.diff old.gcode new.gcode
+"""
+
+import argparse
+import sys
+from array import array
+from collections import namedtuple
+
+from . import analysis
+from .compressed import open_gcode
+
+CHUNK_SIZE = 1 << 20
+Z_TOLERANCE = 1e-4
+
+_EMPTY = hash(b'')
+
+# z is None for the start G-code before the first layer; layer_a / layer_b are
+# layer numbers (None when the layer only exists in the other file); line_a /
+# line_b the first differing line of each file (the layer start when unmatched)
+LayerDiff = namedtuple("LayerDiff", "z layer_a layer_b line_a line_b")
+
+
+def line_hashes(filename, ignore_comments=True):
+    """array('q') with a hash of every line of filename (stripped, comments removed)."""
+    hashes = array('q')
+    rest = b''
+    with open_gcode(filename) as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            lines = (rest + chunk).split(b'\n')
+            rest = lines.pop()
+            hashes.extend(_hash_lines(lines, ignore_comments))
+    hashes.extend(_hash_lines([rest], ignore_comments))
+    return hashes
+
+
+def _hash_lines(lines, ignore_comments):
+    if ignore_comments:
+        return [hash(line.split(b';', 1)[0].strip()) for line in lines]
+    return [hash(line.strip()) for line in lines]
+
+
+def _spans(layers, line_count):
+    """(z, layer number, first_line, end_line) of the start G-code and every layer."""
+    starts = [min(layer.line_no, line_count) for layer in layers]
+    spans = [(None, None, 0, starts[0] if starts else line_count)]
+    for layer, first, end in zip(layers, starts, starts[1:] + [line_count]):
+        spans.append((layer.z, layer.number, first, end))
+    return spans
+
+
+def _digest(hashes, first, end):
+    return hash(tuple(h for h in hashes[first:end] if h != _EMPTY))
+
+
+def _first_difference(hashes_a, first_a, end_a, hashes_b, first_b, end_b):
+    """First lines of the two spans that differ, blank lines skipped."""
+    a = [i for i in range(first_a, end_a) if hashes_a[i] != _EMPTY]
+    b = [j for j in range(first_b, end_b) if hashes_b[j] != _EMPTY]
+    for i, j in zip(a, b):
+        if hashes_a[i] != hashes_b[j]:
+            return i, j
+    # One layer is the other plus some lines at its end
+    n = min(len(a), len(b))
+    return a[n] if n < len(a) else end_a, b[n] if n < len(b) else end_b
+
+
+def _same_z(za, zb):
+    if za is None or zb is None:
+        return za is zb
+    return abs(za - zb) < Z_TOLERANCE
+
+
+def diff_layers(layers_a, hashes_a, layers_b, hashes_b):
+    """LayerDiff of every layer that differs, in Z order."""
+    spans_a = _spans(layers_a, len(hashes_a))
+    spans_b = _spans(layers_b, len(hashes_b))
+    changes = []
+    i = j = 0
+    while i < len(spans_a) or j < len(spans_b):
+        span_a = spans_a[i] if i < len(spans_a) else None
+        span_b = spans_b[j] if j < len(spans_b) else None
+        if span_a and span_b and _same_z(span_a[0], span_b[0]):
+            z, number_a, first_a, end_a = span_a
+            _, number_b, first_b, end_b = span_b
+            if _digest(hashes_a, first_a, end_a) != _digest(hashes_b, first_b, end_b):
+                line_a, line_b = _first_difference(hashes_a, first_a, end_a, hashes_b, first_b, end_b)
+                changes.append(LayerDiff(z, number_a, number_b, line_a, line_b))
+            i += 1
+            j += 1
+        elif span_b is None or span_a is not None and (span_a[0] is None or span_a[0] < span_b[0]):
+            changes.append(LayerDiff(span_a[0], span_a[1], None, span_a[2], None))  # only in a
+            i += 1
+        else:
+            changes.append(LayerDiff(span_b[0], None, span_b[1], None, span_b[2]))  # only in b
+            j += 1
+    return changes
+
+
+def diff_files(file_a, file_b, ignore_comments=True):
+    """Changed layers, time and filament of two G-code files (see format_report)."""
+    result_a = analysis.analyze_cached(file_a)
+    result_b = analysis.analyze_cached(file_b)
+    changes = diff_layers(result_a["layers"], line_hashes(file_a, ignore_comments),
+                          result_b["layers"], line_hashes(file_b, ignore_comments))
+    return {
+        "changes": changes,
+        "layers": (len(result_a["layers"]), len(result_b["layers"])),
+        "time": (result_a["metadata"]["time"], result_b["metadata"]["time"]),
+        "filament_g": (result_a["filament"]["weight_g"], result_b["filament"]["weight_g"]),
+        "first_difference": (changes[0].line_a, changes[0].line_b) if changes else None,
+    }
+
+
+def _layer_label(change):
+    if change.z is None:
+        return "start G-code"
+    if change.layer_b is None:
+        return f"layer {change.layer_a} (Z {change.z:.3f}) only in the first file"
+    if change.layer_a is None:
+        return f"layer {change.layer_b} (Z {change.z:.3f}) only in the second file"
+    return f"layer {change.layer_a} (Z {change.z:.3f})"
+
+
+def _line(line_no):
+    return "-" if line_no is None else str(line_no + 1)
+
+
+def format_report(report, limit=None):
+    """Text summary of a diff_files() report; lines are shown 1-based."""
+    time_a, time_b = report["time"]
+    grams_a, grams_b = report["filament_g"]
+    changes = report["changes"]
+    out = [
+        f"Layers: {report['layers'][0]} -> {report['layers'][1]}, {len(changes)} differ",
+        f"Time: {time_a // 60} min -> {time_b // 60} min ({(time_b - time_a) / 60:+.1f} min)",
+        f"Filament: {grams_a:.2f} g -> {grams_b:.2f} g ({grams_b - grams_a:+.2f} g)",
+    ]
+    if not changes:
+        out.append("No differences")
+        return "\n".join(out)
+    first_a, first_b = report["first_difference"]
+    out.append(f"First difference: line {_line(first_a)} / line {_line(first_b)}")
+    shown = changes if limit is None else changes[:limit]
+    for change in shown:
+        out.append(f"  {_layer_label(change)}: line {_line(change.line_a)} / {_line(change.line_b)}")
+    if len(shown) < len(changes):
+        out.append(f"  ... {len(changes) - len(shown)} more")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two slices of the same model layer by layer")
+    parser.add_argument('first', help="original G-code file")
+    parser.add_argument('second', help="re-sliced G-code file")
+    parser.add_argument('--comments', action='store_true', help="compare comments too")
+    parser.add_argument('--limit', type=int, default=50, help="changed layers to list (default 50)")
+    args = parser.parse_args(argv)
+    report = diff_files(args.first, args.second, ignore_comments=not args.comments)
+    print(format_report(report, args.limit))
+    return 1 if report["changes"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
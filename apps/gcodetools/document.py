@@ -0,0 +1,208 @@
+"""
+Memory-mapped G-code document for the editor.
+
+The file is mapped instead of read: the only per-line state is the LineIndex
+of byte offsets, and line(n) decodes just that line when a view asks for it.
+Opening a 100 MB file costs one indexing pass and 8 bytes per line, however
+much of it is on screen.
+
+Edits go to a piece table. The document is a list of pieces, each a run of
+lines taken either from the original file or from the add buffer (the text
+of every line typed in since opening):
+
+    (ORIGINAL, first_line, count) | (ADDED, first_added, count) | ...
+
+Nothing is copied when editing, and save() streams the ORIGINAL runs
+straight from the map, so only the edited lines go through Python strings.
+It writes to a temp file next to the target and renames it over, so a
+crash leaves either the old or the new file and the mapped original is
+never written while it is being read.
+
+Compressed files (.gcode.gz, .zip, .bgcode) are decompressed to a temp spool
+that is mapped instead, and saving to a .gz / .zip name compresses again
+(binary G-code is only read, it is saved as text).
+"""
+
+import mmap
+import os
+import tempfile
+from bisect import bisect_right
+
+from .compressed import compressed_writer, is_compressed, make_spool
+from .lineindex import LineIndex
+
+ENCODING = 'utf-8'
+
+ORIGINAL = 0
+ADDED = 1
+
+
+class GCodeDocument:
+    def __init__(self, filename, line_index=None):
+        self.filename = filename
+        self._spool = make_spool(filename) if is_compressed(filename) else None
+        self.path = self._spool or filename  # the plain text that is mapped
+        self.line_index = line_index if line_index is not None else LineIndex.from_file(self.path)
+        self.added = []         # add buffer: text of every line typed in
+        self._pieces = None     # [(source, start, count)], None until the first edit
+        self._piece_starts = None
+        self._length = 0
+        self._map()
+        # New lines get the file's own line ending
+        first_end = self.data.find(b'\n')
+        self.newline = b'\r\n' if first_end > 0 and self.data[first_end - 1] == 13 else b'\n'
+
+    def __len__(self):
+        if self._pieces is None:
+            return len(self.line_index)  # may still be growing while indexing
+        return self._length
+
+    @property
+    def modified(self):
+        return self._pieces is not None
+
+    def pieces(self):
+        if self._pieces is None:
+            return [(ORIGINAL, 0, len(self.line_index))]
+        return list(self._pieces)
+
+    def line_bytes(self, line_no):
+        """Original bytes of line_no (of the file on disk) without the line ending."""
+        index = self.line_index
+        line = self.data[index.line_to_offset(line_no):index.line_end(line_no)]
+        return line[:-1] if line.endswith(b'\r') else line
+
+    def line(self, line_no):
+        source, start = ORIGINAL, line_no
+        if self._pieces is not None:
+            i = bisect_right(self._piece_starts, line_no) - 1
+            source, first, _ = self._pieces[i]
+            start = first + line_no - self._piece_starts[i]
+        if source == ADDED:
+            return self.added[start]
+        return self.line_bytes(start).decode(ENCODING, 'replace')
+
+    # Editing
+
+    def replace_lines(self, first, count, lines):
+        """Replace count lines from first with lines (either may be 0 / empty)."""
+        pieces = self.pieces()
+        i = self._split(pieces, first)
+        j = self._split(pieces, first + count)
+        new = []
+        if lines:
+            new.append((ADDED, len(self.added), len(lines)))
+            self.added.extend(lines)
+        pieces[i:j] = new
+        self._set_pieces(pieces)
+
+    def set_line(self, line_no, text):
+        if text != self.line(line_no):
+            self.replace_lines(line_no, 1, [text])
+
+    def insert_lines(self, line_no, lines):
+        self.replace_lines(line_no, 0, lines)
+
+    def delete_lines(self, line_no, count=1):
+        self.replace_lines(line_no, count, [])
+
+    @staticmethod
+    def _split(pieces, line_no):
+        """Split pieces at line_no; index of the piece starting there."""
+        pos = 0
+        for i, (source, start, count) in enumerate(pieces):
+            if line_no == pos:
+                return i
+            if line_no < pos + count:
+                head = line_no - pos
+                pieces[i:i + 1] = [(source, start, head), (source, start + head, count - head)]
+                return i + 1
+            pos += count
+        return len(pieces)
+
+    def _set_pieces(self, pieces):
+        merged = []
+        for piece in pieces:
+            if not piece[2]:
+                continue
+            if merged and merged[-1][0] == piece[0] and sum(merged[-1][1:]) == piece[1]:
+                merged[-1] = (piece[0], merged[-1][1], merged[-1][2] + piece[2])
+            else:
+                merged.append(piece)
+        self._pieces = merged
+        self._piece_starts = []
+        pos = 0
+        for piece in merged:
+            self._piece_starts.append(pos)
+            pos += piece[2]
+        self._length = pos
+
+    # Saving
+
+    def write(self, file):
+        """Write the edited document to a binary file object."""
+        index = self.line_index
+        starts = index.starts
+        missing_newline = False
+        with memoryview(self.data) as view:
+            for source, start, count in self.pieces():
+                if missing_newline:
+                    file.write(self.newline)
+                if source == ORIGINAL:
+                    # Unchanged run, copied from the map with its own line endings
+                    begin = starts[start]
+                    end = starts[start + count] if start + count < len(starts) else index.length
+                    file.write(view[begin:end])
+                    missing_newline = end == index.length and view[end - 1:end] != b'\n'
+                else:
+                    for text in self.added[start:start + count]:
+                        file.write(text.encode(ENCODING))
+                        file.write(self.newline)
+                    missing_newline = False
+
+    def save(self, filename=None):
+        """Write to filename (default: the document's own file) atomically.
+
+        The document is closed afterwards; open the saved file again. When the
+        save fails it is left open, with its edits, and the error is raised.
+        """
+        filename = filename or self.filename
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, compressed_writer(f, filename) as out:
+                self.write(out)
+            if os.path.exists(filename):
+                os.chmod(tmp_path, os.stat(filename).st_mode)
+            # The map has to go before the file under it is replaced (Windows)
+            self._unmap()
+            os.replace(tmp_path, filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            if self._file.closed:
+                self._map()  # the original is still in place
+            raise
+        self.close()
+
+    def _map(self):
+        self._file = open(self.path, 'rb')
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.data = b''  # empty files cannot be mapped
+
+    def _unmap(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b''
+        self._file.close()
+
+    def close(self):
+        self._unmap()
+        if self._spool is not None:
+            try:
+                os.unlink(self._spool)
+            except OSError:
+                pass  # still open in a loader thread (Windows); left to the temp folder
+            self._spool = None
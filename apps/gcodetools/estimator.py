@@ -0,0 +1,117 @@
+"""
+Kinematics-aware print time estimator.
+
+Works on the columnar MoveTable (moves.py) and computes the time with NumPy:
+
+- move length from the XYZ deltas (|E| for extruder-only moves, arc length
+  for G2/G3)
+- cruise speed = F, clamped by the M203 per-axis feedrate limits
+- acceleration = M204 print / travel / retract value in force for the move,
+  clamped by the M201 per-axis limits
+- junction speeds limited by the M205 per-axis jerk (classic jerk, like
+  Marlin and the PrusaSlicer estimate)
+- forward/backward planner passes so every move can reach its exit speed,
+  then a trapezoidal (or triangular) velocity profile per move
+
+The planner passes are usually a Python loop; here they are closed-form
+prefix minimums over the cumulative 2*a*d sums, so the whole plan is a
+handful of array operations.
+"""
+
+import numpy as np
+
+from .machine import AXES
+from .moves import extract_moves
+
+
+def plan_times(dx, dy, dz, de, feed, accel, limits, lengths=None):
+    """Seconds per move for the given arrays (trapezoidal profile with jerk junctions)."""
+    n = len(dx)
+    if n == 0:
+        return np.zeros(0)
+
+    deltas = np.stack([dx, dy, dz, de], axis=1)
+    xyz_length = np.sqrt(dx * dx + dy * dy + dz * dz)
+    length = np.where(xyz_length > 0, xyz_length, np.abs(de))
+    if lengths is not None:
+        length = np.where(lengths > 0, lengths, length)
+    unit = deltas / length[:, None]
+    abs_unit = np.abs(unit)
+
+    max_feedrate = np.array([limits.max_feedrate[a] for a in AXES])
+    max_accel = np.array([limits.max_accel[a] for a in AXES])
+    jerk = np.array([limits.jerk[a] for a in AXES])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # cruise speed: F clamped so no axis exceeds its M203 limit
+        speed = np.minimum(feed, np.min(np.where(abs_unit > 0, max_feedrate / abs_unit, np.inf), axis=1))
+        # acceleration clamped the same way by M201
+        accel = np.minimum(accel, np.min(np.where(abs_unit > 0, max_accel / abs_unit, np.inf), axis=1))
+
+        # speed every move can start/stop at from rest without exceeding jerk
+        safe = np.minimum(speed, np.min(np.where(abs_unit > 0, jerk / abs_unit, np.inf), axis=1))
+
+        # junction i is the entry of move i; the axis velocity change there is
+        # v * |u_i - u_(i-1)| which must stay below the jerk limit
+        change = np.abs(unit[1:] - unit[:-1])
+        junction = np.min(np.where(change > 0, jerk / change, np.inf), axis=1)
+    junction = np.minimum(junction, np.minimum(speed[1:], speed[:-1]))
+    junction = np.maximum(junction, np.minimum(safe[1:], safe[:-1]))
+
+    # squared speed caps at the n + 1 junctions (start, between moves, end)
+    cap = np.empty(n + 1)
+    cap[0] = safe[0] ** 2
+    cap[1:-1] = junction ** 2
+    cap[-1] = safe[-1] ** 2
+
+    # v_(k+1)^2 <= v_k^2 + 2*a_k*d_k  forward, and the mirror backward:
+    # with W_k = sum_(j<k) 2*a_j*d_j both become running minimums
+    w = np.zeros(n + 1)
+    np.cumsum(2.0 * accel * length, out=w[1:])
+    forward = np.minimum.accumulate(cap - w) + w
+    v2 = np.minimum.accumulate((forward + w)[::-1])[::-1] - w
+    v2 = np.maximum(v2, 0.0)
+
+    v0 = np.sqrt(v2[:-1])
+    v1 = np.sqrt(v2[1:])
+    cruise2 = speed ** 2
+    peak2 = (2.0 * accel * length + v2[:-1] + v2[1:]) / 2.0
+
+    triangle = peak2 <= cruise2
+    peak = np.sqrt(np.minimum(peak2, cruise2))
+    ramp_time = (2.0 * peak - v0 - v1) / accel
+    ramp_dist = (2.0 * cruise2 - v2[:-1] - v2[1:]) / (2.0 * accel)
+    cruise_time = np.where(triangle, 0.0, (length - ramp_dist) / speed)
+    return ramp_time + np.maximum(cruise_time, 0.0)
+
+
+def move_times(table):
+    """Seconds of every move of a MoveTable (G4 dwells not included)."""
+    if not len(table):
+        return np.zeros(0)
+    moves = table.moves
+    dx, dy, dz = table.deltas()
+    de = moves['e'].astype(np.float64)
+
+    # Marlin picks the retract acceleration for extruder-only moves, the
+    # print acceleration when E moves along, the travel one otherwise
+    states = np.array(table.accel_states)
+    extruder_only = (dx == 0) & (dy == 0) & (dz == 0)
+    column = np.where(extruder_only, 2, np.where(de != 0, 0, 1))
+    accel = states[moves['accel'], column]
+
+    return plan_times(dx, dy, dz, de, moves['f'].astype(np.float64) / 60.0,
+                      accel, table.limits, table.lengths())
+
+
+def estimate_table(table, times=None):
+    """Total seconds for a MoveTable (moves + G4 dwells); pass move_times() when
+    they are already computed."""
+    if times is None:
+        times = move_times(table)
+    return float(times.sum()) + table.dwell
+
+
+def estimate_time(filename):
+    """Estimated print time of a G-code file in seconds."""
+    return estimate_table(extract_moves(filename))
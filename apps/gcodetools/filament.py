@@ -0,0 +1,45 @@
+"""
+Filament accounting over the move table.
+
+The MoveTable already holds the extruder delta of every move with M82/M83
+modes and G92 E resets applied, so everything here is a bulk reduction over
+the 'e' and 'type' columns: printed length, retractions and unretractions
+kept apart, and the used length turned into volume and weight.
+"""
+
+import math
+
+import numpy as np
+
+from .moves import MOVE_EXTRUDE, MOVE_RETRACT, MOVE_UNRETRACT
+from .pricing import FILAMENT_DENSITY, FILAMENT_DIAMETER
+
+
+def retraction_starts(move_type):
+    """Mask of the moves that begin a retraction; one split over several wipe
+    moves is still one retraction."""
+    retracting = move_type == MOVE_RETRACT
+    return retracting & ~np.concatenate(([False], retracting[:-1]))
+
+
+def filament_usage(table, diameter=FILAMENT_DIAMETER, density=FILAMENT_DENSITY):
+    """Used length (mm/m), volume (cm3) and weight (g) plus retraction totals."""
+    e = table.moves['e'].astype(np.float64)
+    move_type = table.moves['type']
+
+    retracted = -float(e[move_type == MOVE_RETRACT].sum())
+    unretracted = float(e[move_type == MOVE_UNRETRACT].sum())
+    # Filament laid down by printing moves; same figure the slicers report
+    used = float(e[move_type == MOVE_EXTRUDE].sum())
+
+    volume_cm3 = math.pi * (diameter / 2.0) ** 2 * used / 1000.0
+    return {
+        "retracted_mm": retracted,
+        "unretracted_mm": unretracted,
+        "retractions": int(retraction_starts(move_type).sum()),
+        "net_mm": float(e.sum()),
+        "length_mm": used,
+        "length_m": used / 1000.0,
+        "volume_cm3": volume_cm3,
+        "weight_g": volume_cm3 * density,
+    }
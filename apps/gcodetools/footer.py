@@ -0,0 +1,136 @@
+"""
+Tail-seeking reader for the PrusaSlicer footer.
+
+PrusaSlicer writes its estimates ("; estimated printing time", "; filament
+used [g]", ...) and the whole config block as "; key = value" comments in
+the last few hundred lines. Instead of scanning the multi-MB body we seek
+backwards from EOF in fixed-size blocks and stop at the last G-code command,
+so the cost only depends on the size of the footer. Compressed files cannot
+seek, so for those the tail is kept while streaming through them.
+"""
+
+import json
+import os
+import re
+
+from .compressed import is_compressed, open_gcode, read_tail
+from .scanner import default_metadata
+
+BLOCK_SIZE = 8192
+MAX_FOOTER_BYTES = 512 * 1024  # give up on files that have no footer at all
+
+GENERATOR_BYTES = 4096  # the line is first, unless lines were added above it
+_GENERATED_BY = re.compile(r'^; generated by (.+?)(?: on |$)', re.MULTILINE | re.IGNORECASE)
+_DURATION_PART = re.compile(r'(\d+)\s*([dhms])')
+_DURATION_UNITS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def iter_lines_reversed(filename, block_size=BLOCK_SIZE, max_bytes=MAX_FOOTER_BYTES):
+    """Yield the raw lines of a file (as bytes) from the last one backwards."""
+    if is_compressed(filename):
+        data = read_tail(filename, max_bytes)
+        lines = data.split(b'\n')
+        if len(data) == max_bytes:
+            lines.pop(0)  # cut in the middle
+        yield from reversed(lines)
+        return
+    with open(filename, 'rb') as file:
+        pos = file.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > 0 and max_bytes > 0:
+            step = min(block_size, pos, max_bytes)
+            pos -= step
+            max_bytes -= step
+            file.seek(pos)
+            lines = (file.read(step) + tail).split(b'\n')
+            # The first piece may be cut in the middle, keep it for the next block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+        if pos == 0 and tail:
+            yield tail
+
+
+def read_footer(filename, block_size=BLOCK_SIZE, max_bytes=MAX_FOOTER_BYTES):
+    """Return the "; key = value" comments after the last G-code command."""
+    footer = {}
+    for raw in iter_lines_reversed(filename, block_size, max_bytes):
+        line = raw.strip()
+        if not line:
+            continue
+        if not line.startswith(b';'):
+            break
+        key, sep, value = line[1:].decode('utf-8', 'replace').partition(' =')
+        if sep:
+            footer.setdefault(key.strip(), value.strip())
+    return footer
+
+
+def parse_duration(text):
+    """'1d 2h 51m 14s' -> seconds"""
+    return sum(int(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_PART.findall(text))
+
+
+def parse_generator(head):
+    """Slicer name/version from the '; generated by ...' line of head, if any."""
+    match = _GENERATED_BY.search(head)
+    return match.group(1).strip() if match else None
+
+
+def read_generator(filename):
+    """parse_generator() of the first GENERATOR_BYTES of the file."""
+    with open_gcode(filename) as file:
+        head = file.read(GENERATOR_BYTES).decode('utf-8', 'replace')
+    return parse_generator(head)
+
+
+def _float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _apply_object_bounds(metadata, objects_info):
+    try:
+        objects = json.loads(objects_info)["objects"]
+        points = [p for obj in objects for p in obj["polygon"]]
+    except (ValueError, KeyError, TypeError):
+        return
+    if points:
+        metadata["minx"] = min(p[0] for p in points)
+        metadata["maxx"] = max(p[0] for p in points)
+        metadata["miny"] = min(p[1] for p in points)
+        metadata["maxy"] = max(p[1] for p in points)
+
+
+def footer_metadata(footer):
+    """Map a PrusaSlicer footer onto the metadata dict used by the apps."""
+    metadata = default_metadata()
+    time_key = next((k for k in footer if k.startswith('estimated printing time')), None)
+    if time_key:
+        metadata["time"] = parse_duration(footer[time_key])
+    if 'filament used [mm]' in footer:
+        metadata["filament"] = f"{_float(footer['filament used [mm]']) / 1000:.2f}m"
+    if 'filament used [g]' in footer:
+        metadata["filament_g"] = _float(footer['filament used [g]'])
+    if 'gcode_flavor' in footer:
+        metadata["flavor"] = footer['gcode_flavor']
+    if 'layer_height' in footer:
+        metadata["layer_height"] = _float(footer['layer_height'])
+    printer = footer.get('printer_model') or footer.get('printer_settings_id')
+    if printer:
+        metadata["printer"] = printer
+    if 'objects_info' in footer:
+        _apply_object_bounds(metadata, footer['objects_info'])
+    return metadata
+
+
+def read_prusa_metadata(filename):
+    """Metadata from the PrusaSlicer footer, or None if the file has none."""
+    footer = read_footer(filename)
+    if not any(k.startswith('estimated printing time') for k in footer):
+        return None
+    metadata = footer_metadata(footer)
+    metadata["slicer"] = read_generator(filename) or "PrusaSlicer"
+    return metadata
@@ -0,0 +1,175 @@
+"""
+Per-layer table of a G-code file.
+
+One scanner pass records, for every layer change marker, the layer number,
+line, byte offset, Z, layer height and how many moves / extruding moves the
+layer contains. PrusaSlicer's ";Z:" and ";HEIGHT:" comments after
+";LAYER_CHANGE" are used when present, otherwise Z comes from the first Z
+move of the layer.
+
+The table is saved as a "<file>.layers.json" sidecar so reopening the same
+file does not need another scan.
+"""
+
+import json
+import os
+from bisect import bisect_right
+from collections import namedtuple
+
+from .scanner import MOVE_COMMANDS, is_layer_marker, scan
+
+SIDECAR_SUFFIX = '.layers.json'
+SIDECAR_VERSION = 2
+
+Layer = namedtuple("Layer", "number line_no offset z height extrusions moves")
+
+
+class LayerTable:
+    """Scanner consumer building the list of Layer entries."""
+
+    def __init__(self):
+        self.layers = []
+        self._current = None
+        self._relative = False  # G91, XYZ (and E) relative
+        self._relative_e = False
+        self._e = 0.0
+        self._z = 0.0
+
+    def _close_layer(self):
+        if self._current is None:
+            return
+        layer = self._current
+        if layer["z"] is None:
+            layer["z"] = self._z
+        if layer["height"] is None:
+            previous = self.layers[-1].z if self.layers else 0.0
+            layer["height"] = round(layer["z"] - previous, 4)
+        self.layers.append(Layer(**layer))
+        self._current = None
+
+    def feed(self, record):
+        command = record.command
+        if command is None:
+            comment = record.comment
+            if not comment:
+                return
+            if is_layer_marker(comment):
+                self._close_layer()
+                self._current = {
+                    "number": len(self.layers), "line_no": record.line_no,
+                    "offset": record.offset, "z": None, "height": None,
+                    "extrusions": 0, "moves": 0,
+                }
+            elif self._current is not None and comment[:2] in ('Z:', 'HE'):
+                key, _, value = comment.partition(':')
+                try:
+                    if key == 'Z':
+                        self._current["z"] = float(value)
+                    elif key == 'HEIGHT':
+                        self._current["height"] = float(value)
+                except ValueError:
+                    pass
+            return
+
+        params = record.params
+        if command in MOVE_COMMANDS:
+            # parse_line leaves a value it cannot read as a string (e.g. a bare "E")
+            z = params.get('Z')
+            if isinstance(z, float):
+                z = self._z = self._z + z if self._relative else z
+            else:
+                z = None
+            e = params.get('E')
+            extruding = False
+            if isinstance(e, float):
+                extruding = e > 0 if self._relative_e else e > self._e
+                if not self._relative_e:
+                    self._e = e
+            current = self._current
+            if current is not None:
+                current["moves"] += 1
+                if extruding:
+                    current["extrusions"] += 1
+                if current["z"] is None and z is not None:
+                    current["z"] = z
+        elif command == 'G90':
+            self._relative = self._relative_e = False
+        elif command == 'G91':
+            self._relative = self._relative_e = True
+        elif command == 'M83':
+            self._relative_e = True
+        elif command == 'M82':
+            self._relative_e = False
+        elif command == 'G92':
+            if not params:
+                self._z = self._e = 0.0
+            if isinstance(params.get('Z'), float):
+                self._z = params['Z']
+            if isinstance(params.get('E'), float):
+                self._e = params['E']
+
+    def result(self):
+        self._close_layer()
+        return self.layers
+
+
+def build_layer_table(filename):
+    return scan(filename, [LayerTable()])[0]
+
+
+def sidecar_path(filename):
+    return filename + SIDECAR_SUFFIX
+
+
+def _source_stamp(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def save_layer_table(filename, layers):
+    data = {
+        "version": SIDECAR_VERSION,
+        "source": _source_stamp(filename),
+        "fields": list(Layer._fields),
+        "layers": [list(layer) for layer in layers],
+    }
+    with open(sidecar_path(filename), 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+def read_layer_table(filename):
+    """Layers from the sidecar, or None when it is missing or stale."""
+    try:
+        with open(sidecar_path(filename), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != SIDECAR_VERSION or data.get("source") != _source_stamp(filename):
+            return None
+        return [Layer(*row) for row in data["layers"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def load_layer_table(filename):
+    """Cached layer table for filename, rebuilt and re-saved when stale."""
+    layers = read_layer_table(filename)
+    if layers is None:
+        layers = build_layer_table(filename)
+        try:
+            save_layer_table(filename, layers)
+        except OSError:
+            pass  # read-only folder, just don't cache
+    return layers
+
+
+def layer_at_z(layers, z):
+    """Index of the layer printed at height z (the last one starting at or below it)."""
+    if not layers:
+        return None
+    index = bisect_right([layer.z for layer in layers], z + 1e-6) - 1
+    return max(index, 0)
+
+
+def layer_spans(layers, line_count):
+    """(first_line, end_line) of every layer; a layer runs up to the next marker."""
+    starts = [layer.line_no for layer in layers]
+    return list(zip(starts, starts[1:] + [line_count]))
@@ -0,0 +1,71 @@
+"""
+Line-start offset index.
+
+Built once in a single pass, stored in an array('q') (8 bytes per line), and
+then answers line -> offset in O(1) and offset -> line in O(log n) by
+bisection. Built from a str the offsets are character positions (what a
+QTextEdit cursor wants); built from a file they are byte offsets. extend()
+adds text piece by piece, so a loader can index chunks as it reads them.
+"""
+
+from array import array
+from bisect import bisect_right
+
+from .compressed import open_gcode
+
+CHUNK_SIZE = 1 << 20
+
+
+class LineIndex:
+    def __init__(self, starts, length):
+        self.starts = starts  # offset of the first character of every line
+        self.length = length  # total size of the indexed text
+
+    @classmethod
+    def from_text(cls, text):
+        index = cls(array('q', [0]), 0)
+        index.extend(text)
+        return index
+
+    def extend(self, text):
+        """Index text (str or bytes) appended after everything indexed so far."""
+        newline = b'\n' if isinstance(text, bytes) else '\n'
+        base = self.length
+        find = text.find
+        append = self.starts.append
+        pos = find(newline)
+        while pos != -1:
+            append(base + pos + 1)
+            pos = find(newline, pos + 1)
+        self.length += len(text)
+
+    @classmethod
+    def from_file(cls, filename, chunk_size=CHUNK_SIZE):
+        index = cls(array('q', [0]), 0)
+        with open_gcode(filename) as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                index.extend(chunk)
+        return index
+
+    def __len__(self):
+        # A trailing newline does not start another line
+        if len(self.starts) > 1 and self.starts[-1] == self.length:
+            return len(self.starts) - 1
+        return len(self.starts)
+
+    def line_to_offset(self, line_no):
+        """Offset of the first character of line_no (0-based)."""
+        return self.starts[line_no]
+
+    def line_end(self, line_no):
+        """Offset just past the last character of line_no, newline excluded."""
+        if line_no + 1 < len(self.starts):
+            return self.starts[line_no + 1] - 1
+        return self.length
+
+    def offset_to_line(self, offset):
+        """Line number containing offset."""
+        return max(bisect_right(self.starts, offset) - 1, 0)
@@ -0,0 +1,53 @@
+"""
+Machine limits declared in the G-code (M201/M203/M204/M205).
+"""
+
+AXES = ('X', 'Y', 'Z', 'E')
+
+# Marlin-ish defaults, overridden by the M201/M203/M204/M205 in the file
+DEFAULT_MAX_ACCEL = {"X": 500.0, "Y": 500.0, "Z": 100.0, "E": 5000.0}   # mm/s^2
+DEFAULT_MAX_FEEDRATE = {"X": 500.0, "Y": 500.0, "Z": 10.0, "E": 60.0}   # mm/s
+DEFAULT_JERK = {"X": 8.0, "Y": 8.0, "Z": 0.4, "E": 5.0}                 # mm/s
+DEFAULT_ACCEL = {"print": 500.0, "retract": 1000.0, "travel": 1000.0}   # mm/s^2
+
+
+class MachineLimits:
+    """Machine limits as declared by M201/M203/M204/M205."""
+
+    def __init__(self):
+        self.max_accel = dict(DEFAULT_MAX_ACCEL)
+        self.max_feedrate = dict(DEFAULT_MAX_FEEDRATE)
+        self.jerk = dict(DEFAULT_JERK)
+        self.accel = dict(DEFAULT_ACCEL)
+
+    def apply(self, command, params):
+        """Update from one M20x command; returns True if it was one."""
+        if command == 'M201':
+            self._update_axes(self.max_accel, params)
+        elif command == 'M203':
+            self._update_axes(self.max_feedrate, params)
+        elif command == 'M205':
+            self._update_axes(self.jerk, params)
+        elif command == 'M204':
+            # S sets print and travel (legacy Marlin), P/R/T set them one by one
+            if params.get('S'):
+                self.accel["print"] = self.accel["travel"] = params['S']
+            if params.get('P'):
+                self.accel["print"] = params['P']
+            if params.get('R'):
+                self.accel["retract"] = params['R']
+            if params.get('T'):
+                self.accel["travel"] = params['T']
+        else:
+            return False
+        return True
+
+    def accel_state(self):
+        return (self.accel["print"], self.accel["travel"], self.accel["retract"])
+
+    @staticmethod
+    def _update_axes(target, params):
+        for axis in AXES:
+            value = params.get(axis)
+            if isinstance(value, float):
+                target[axis] = value
@@ -0,0 +1,252 @@
+"""
+Columnar NumPy move table.
+
+One scanner pass turns every G0/G1/G2/G3 that actually moves something into
+a row of a structured array:
+
+    x, y, z   end position (mm)
+    e         extruder delta of the move (mm of filament, M82/M83/G92 aware)
+    f         feedrate (mm/min)
+    line      0-based source line
+    type      MOVE_TRAVEL / MOVE_EXTRUDE / MOVE_RETRACT / MOVE_UNRETRACT
+    layer     index of the layer change marker before it (-1 before the first)
+    feature   index into MoveTable.features (";TYPE:" comments)
+    accel     index into MoveTable.accel_states (M204 in force)
+
+so statistics, estimation, bounding boxes and previews are array operations
+instead of Python loops. Pass float_type=np.float32 to halve the memory of
+the float columns. F-only lines like "G1 F1200" carry no geometry and only
+update the feedrate of the following moves.
+"""
+
+import math
+from array import array
+
+import numpy as np
+
+from .machine import AXES, MachineLimits
+from .scanner import MOVE_COMMANDS, is_layer_marker, scan
+
+MOVE_TRAVEL = 0
+MOVE_EXTRUDE = 1
+MOVE_RETRACT = 2
+MOVE_UNRETRACT = 3
+MOVE_TYPES = ("travel", "extrude", "retract", "unretract")
+
+DEFAULT_FEEDRATE = 1500.0  # mm/min until the file sets one
+NO_FEATURE = "None"
+
+
+def move_dtype(float_type=np.float64):
+    return np.dtype([
+        ('x', float_type), ('y', float_type), ('z', float_type),
+        ('e', float_type), ('f', float_type),
+        ('line', np.int32), ('type', np.uint8), ('layer', np.int32),
+        ('feature', np.uint8), ('accel', np.uint16),
+    ])
+
+
+def arc_length(dx, dy, dz, params, clockwise):
+    """Length of a G2/G3 arc given as I/J center offsets."""
+    i = params.get('I') or 0.0
+    j = params.get('J') or 0.0
+    radius = math.hypot(i, j)
+    if not radius:
+        return 0.0
+    start = math.atan2(-j, -i)
+    end = math.atan2(dy - j, dx - i)
+    angle = start - end if clockwise else end - start
+    if angle <= 0:
+        angle += 2 * math.pi
+    return math.hypot(radius * angle, dz)
+
+
+class MoveTable:
+    def __init__(self, moves, features, accel_states, limits, arc_lengths=None,
+                 dwell=0.0, start=(0.0, 0.0, 0.0)):
+        self.moves = moves                  # structured array, see move_dtype()
+        self.features = features            # feature names, indexed by moves['feature']
+        self.accel_states = accel_states    # (print, travel, retract) accelerations
+        self.limits = limits                # MachineLimits at the end of the file
+        self.arc_lengths = arc_lengths or {}  # row -> length for G2/G3 rows
+        self.dwell = dwell                  # total G4 seconds
+        self.start = start                  # position before the first move
+
+    def __len__(self):
+        return len(self.moves)
+
+    def deltas(self):
+        """dx, dy, dz of every move as float64 arrays."""
+        result = []
+        for axis, origin in zip('xyz', self.start):
+            column = self.moves[axis].astype(np.float64)
+            result.append(np.diff(column, prepend=origin))
+        return result
+
+    def lengths(self):
+        """Path length of every move (|e| for extruder-only moves)."""
+        dx, dy, dz = self.deltas()
+        length = np.sqrt(dx * dx + dy * dy + dz * dz)
+        length = np.where(length > 0, length, np.abs(self.moves['e'].astype(np.float64)))
+        if self.arc_lengths:
+            rows = list(self.arc_lengths)
+            length[rows] = list(self.arc_lengths.values())
+        return length
+
+    def bounding_box(self, extruding_only=True):
+        """((minx, miny, minz), (maxx, maxy, maxz)) or None for an empty table."""
+        moves = self.moves
+        if extruding_only:
+            moves = moves[moves['type'] == MOVE_EXTRUDE]
+        if not len(moves):
+            return None
+        low = tuple(float(moves[axis].min()) for axis in 'xyz')
+        high = tuple(float(moves[axis].max()) for axis in 'xyz')
+        return low, high
+
+    def layer_range(self, layer):
+        """(start, stop) rows of the given layer index."""
+        layers = self.moves['layer']
+        return (int(np.searchsorted(layers, layer, 'left')),
+                int(np.searchsorted(layers, layer, 'right')))
+
+    def feature_index(self, name):
+        try:
+            return self.features.index(name)
+        except ValueError:
+            return None
+
+
+class MoveExtractor:
+    """Scanner consumer building a MoveTable."""
+
+    def __init__(self, float_type=np.float64, limits=None):
+        self.float_type = float_type
+        self.limits = limits or MachineLimits()
+        self.columns = {
+            "x": array('d'), "y": array('d'), "z": array('d'),
+            "e": array('d'), "f": array('d'),
+            "line": array('i'), "type": array('B'), "layer": array('i'),
+            "feature": array('B'), "accel": array('H'),
+        }
+        self.features = [NO_FEATURE]
+        self.accel_states = [self.limits.accel_state()]
+        self._accel_index = {self.accel_states[0]: 0}
+        self.arc_lengths = {}
+        self.dwell = 0.0
+        # physical position, and G92 offsets (logical = physical - offset)
+        self.pos = {"X": 0.0, "Y": 0.0, "Z": 0.0}
+        self.offset = {"X": 0.0, "Y": 0.0, "Z": 0.0}
+        self.e = 0.0
+        self.relative = False
+        self.relative_e = False
+        self.feedrate = DEFAULT_FEEDRATE
+        self.layer = -1
+        self.feature = 0
+        self.accel = 0
+
+    def feed(self, record):
+        command = record.command
+        if command is None:
+            comment = record.comment
+            if comment:
+                if comment.startswith('TYPE:'):
+                    self._set_feature(comment[5:].strip())
+                elif is_layer_marker(comment):
+                    self.layer += 1
+            return
+        params = record.params
+        if command in MOVE_COMMANDS:
+            self._move(record.line_no, command, params)
+        elif command == 'G92':
+            self._set_position(params)
+        elif command == 'G90':
+            self.relative = self.relative_e = False
+        elif command == 'G91':
+            self.relative = self.relative_e = True
+        elif command == 'M82':
+            self.relative_e = False
+        elif command == 'M83':
+            self.relative_e = True
+        elif command == 'G4':
+            if params.get('S'):
+                self.dwell += params['S']
+            elif params.get('P'):
+                self.dwell += params['P'] / 1000.0
+        elif self.limits.apply(command, params) and command == 'M204':
+            state = self.limits.accel_state()
+            if state not in self._accel_index:
+                self._accel_index[state] = len(self.accel_states)
+                self.accel_states.append(state)
+            self.accel = self._accel_index[state]
+
+    def _set_feature(self, name):
+        if name not in self.features:
+            if len(self.features) >= 255:
+                return  # uint8 column; keep the previous feature
+            self.features.append(name)
+        self.feature = self.features.index(name)
+
+    def _set_position(self, params):
+        if not params:
+            params = dict.fromkeys(AXES, 0.0)
+        for axis in ('X', 'Y', 'Z'):
+            if isinstance(params.get(axis), float):
+                self.offset[axis] = self.pos[axis] - params[axis]
+        if isinstance(params.get('E'), float):
+            self.e = params['E']
+
+    def _move(self, line_no, command, params):
+        if isinstance(params.get('F'), float) and params['F'] > 0:
+            self.feedrate = params['F']
+        pos = self.pos
+        old = (pos["X"], pos["Y"], pos["Z"])
+        for axis in ('X', 'Y', 'Z'):
+            value = params.get(axis)
+            if isinstance(value, float):
+                pos[axis] = pos[axis] + value if self.relative else value + self.offset[axis]
+        de = 0.0
+        value = params.get('E')
+        if isinstance(value, float):
+            de = value if self.relative_e else value - self.e
+            self.e += de
+        dx, dy, dz = pos["X"] - old[0], pos["Y"] - old[1], pos["Z"] - old[2]
+        if not (dx or dy or dz or de):
+            return
+
+        columns = self.columns
+        if command in ('G2', 'G3'):
+            length = arc_length(dx, dy, dz, params, clockwise=command == 'G2')
+            if length:
+                self.arc_lengths[len(columns["x"])] = length
+
+        if de < 0:
+            move_type = MOVE_RETRACT
+        elif de > 0:
+            move_type = MOVE_EXTRUDE if (dx or dy or dz) else MOVE_UNRETRACT
+        else:
+            move_type = MOVE_TRAVEL
+
+        columns["x"].append(pos["X"])
+        columns["y"].append(pos["Y"])
+        columns["z"].append(pos["Z"])
+        columns["e"].append(de)
+        columns["f"].append(self.feedrate)
+        columns["line"].append(line_no)
+        columns["type"].append(move_type)
+        columns["layer"].append(self.layer)
+        columns["feature"].append(self.feature)
+        columns["accel"].append(self.accel)
+
+    def result(self):
+        dtype = move_dtype(self.float_type)
+        moves = np.empty(len(self.columns["x"]), dtype=dtype)
+        for name, column in self.columns.items():
+            moves[name] = np.frombuffer(column, dtype=column.typecode) if len(column) else []
+        return MoveTable(moves, self.features, self.accel_states, self.limits,
+                         self.arc_lengths, self.dwell)
+
+
+def extract_moves(filename, float_type=np.float64):
+    """MoveTable of a G-code file."""
+    return scan(filename, [MoveExtractor(float_type)])[0]
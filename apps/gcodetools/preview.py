@@ -0,0 +1,145 @@
+"""
+Line vertex buffers for a 3D toolpath preview.
+
+Every extruding move of a MoveTable becomes one line segment (two vertices)
+in a float32 buffer laid out layer after layer, with a per-layer offset
+table, so the buffer of any visible layer range is a single slice: no
+per-layer draw items and nothing to concatenate when the range changes.
+
+Level of detail: at lod=k a continuous run of extrusion moves (same layer
+and feature) keeps only every k-th point plus its last one, which is
+enough for layers far below the ones being looked at. Each lod level is
+built once, vectorized over the whole table, and cached.
+
+Colors are per vertex, by feature (";TYPE:") or by feedrate.
+"""
+
+import zlib
+
+import numpy as np
+
+from .moves import MOVE_EXTRUDE
+
+COLOR_BY_FEATURE = 'feature'
+COLOR_BY_SPEED = 'speed'
+
+# PrusaSlicer-like colors for the common features; anything else gets a stable hashed color
+FEATURE_COLORS = {
+    "perimeter": (1.0, 0.9, 0.3),
+    "external perimeter": (1.0, 0.49, 0.22),
+    "overhang perimeter": (0.0, 0.0, 1.0),
+    "internal infill": (0.69, 0.19, 0.16),
+    "solid infill": (0.59, 0.33, 0.8),
+    "top solid infill": (0.94, 0.25, 0.25),
+    "bridge infill": (0.3, 0.5, 0.73),
+    "gap fill": (1.0, 1.0, 1.0),
+    "skirt/brim": (0.0, 0.53, 0.43),
+    "skirt": (0.0, 0.53, 0.43),
+    "support material": (0.0, 1.0, 0.0),
+    "support material interface": (0.0, 0.5, 0.0),
+    "wall-outer": (1.0, 0.49, 0.22),
+    "wall-inner": (1.0, 0.9, 0.3),
+    "fill": (0.69, 0.19, 0.16),
+    "skin": (0.94, 0.25, 0.25),
+    "support": (0.0, 1.0, 0.0),
+}
+SPEED_LOW = (0.1, 0.3, 0.9)
+SPEED_HIGH = (0.95, 0.2, 0.1)
+
+
+def feature_color(name):
+    color = FEATURE_COLORS.get(name.lower())
+    if color is None:
+        h = zlib.crc32(name.encode('utf-8'))
+        color = (0.3 + (h & 0xff) / 365.0, 0.3 + (h >> 8 & 0xff) / 365.0, 0.3 + (h >> 16 & 0xff) / 365.0)
+    return color
+
+
+class ToolpathBuffers:
+    def __init__(self, table):
+        self.table = table
+        moves = table.moves
+        self.layer_column = np.maximum(moves['layer'], 0)  # prime lines go with the first layer
+        self.layer_count = int(self.layer_column.max()) + 1 if len(moves) else 0
+        self._levels = {}   # lod -> (vertices, rows, layer vertex offsets)
+        self._colors = {}   # (lod, color_by) -> colors
+
+    def _level(self, lod):
+        level = self._levels.get(lod)
+        if level is None:
+            level = self._levels[lod] = self._build(lod)
+        return level
+
+    def _build(self, lod):
+        table = self.table
+        moves = table.moves
+        ends = np.empty((len(moves), 3), dtype=np.float32)
+        for i, axis in enumerate('xyz'):
+            ends[:, i] = moves[axis]
+        starts = np.empty_like(ends)
+        if len(moves):
+            starts[0] = table.start
+            starts[1:] = ends[:-1]
+
+        drawn = moves['type'] == MOVE_EXTRUDE
+        layer = self.layer_column
+        feature = moves['feature']
+        # A run breaks where extrusion stops or the layer or feature changes
+        run_start = drawn.copy()
+        run_start[1:] &= ~drawn[:-1] | (layer[1:] != layer[:-1]) | (feature[1:] != feature[:-1])
+
+        rows = np.flatnonzero(drawn)
+        run_first = np.flatnonzero(run_start)
+        run_id = np.cumsum(run_start)[rows] - 1
+        if lod > 1 and len(rows):
+            position = rows - run_first[run_id]
+            last = np.append(run_id[1:] != run_id[:-1], True)
+            kept = ((position + 1) % lod == 0) | last
+            rows, run_id = rows[kept], run_id[kept]
+
+        # A kept point connects to the previous kept point of its run, or to where the run began
+        segment_starts = starts[run_first[run_id]] if len(rows) else starts[:0]
+        same_run = np.zeros(len(rows), dtype=bool)
+        same_run[1:] = run_id[1:] == run_id[:-1]
+        segment_starts[same_run] = ends[rows[:-1][same_run[1:]]]
+
+        vertices = np.empty((2 * len(rows), 3), dtype=np.float32)
+        vertices[0::2] = segment_starts
+        vertices[1::2] = ends[rows]
+        offsets = 2 * np.searchsorted(layer[rows], np.arange(self.layer_count + 1))
+        return vertices, rows, offsets
+
+    def colors(self, lod=1, color_by=COLOR_BY_FEATURE):
+        """RGBA float32 color of every vertex of the given lod level."""
+        key = (lod, color_by)
+        colors = self._colors.get(key)
+        if colors is None:
+            _, rows, _ = self._level(lod)
+            moves = self.table.moves
+            if color_by == COLOR_BY_SPEED:
+                f = moves['f'][rows].astype(np.float32)
+                span = float(f.max() - f.min()) if len(f) else 0.0
+                t = (f - f.min()) / span if span else np.zeros_like(f)
+                rgb = np.outer(1 - t, SPEED_LOW) + np.outer(t, SPEED_HIGH)
+            else:
+                palette = np.array([feature_color(name) for name in self.table.features],
+                                   dtype=np.float32)
+                rgb = palette[moves['feature'][rows]]
+            colors = np.ones((2 * len(rows), 4), dtype=np.float32)
+            colors[0::2, :3] = rgb
+            colors[1::2, :3] = rgb
+            self._colors[key] = colors
+        return colors
+
+    def layer_range(self, first, last, lod=1, color_by=COLOR_BY_FEATURE):
+        """(vertices, colors) of layers first..last inclusive; views, not copies."""
+        vertices, _, offsets = self._level(lod)
+        first = max(first, 0)
+        last = min(last, self.layer_count - 1)
+        if first > last:
+            return vertices[:0], self.colors(lod, color_by)[:0]
+        begin, end = offsets[first], offsets[last + 1]
+        return vertices[begin:end], self.colors(lod, color_by)[begin:end]
+
+    def vertex_count(self, lod=1):
+        return len(self._level(lod)[0])
@@ -0,0 +1,50 @@
+"""
+Price calculation shared by the Pricing tab and the batch analyzer.
+"""
+
+import math
+
+# Defaults of the Pricing tab input fields
+DEFAULT_RATES = {
+    "post": 20.0,              # post-processing cost (Rs)
+    "profit": 30.0,            # profit margin (%)
+    "electricity_rate": 8.0,   # Rs/kWh
+    "machine_rate": 50.0,      # Rs/hour
+}
+
+COST_PER_GRAM = 0.7
+POWER_USAGE_KW = 0.12
+FILAMENT_DIAMETER = 1.75  # mm
+FILAMENT_DENSITY = 1.24   # g/cm3, PLA
+
+
+def filament_weight(filament_str, diameter=FILAMENT_DIAMETER, density=FILAMENT_DENSITY):
+    """Weight in grams from a filament length string like "12.34m" or "4376mm"."""
+    value_str = ''.join(filter(lambda x: x.isdigit() or x in ['.', ','], filament_str))
+    value = float(value_str.replace(',', '.'))
+
+    if "mm" in filament_str.lower():
+        length_mm = value
+    else:
+        length_mm = value * 1000.0  # assume meters if no unit specified
+
+    volume_cm3 = math.pi * (diameter / 2.0) ** 2 * length_mm / 1000.0
+    return volume_cm3 * density
+
+
+def compute_price(weight, time_hours, post=DEFAULT_RATES["post"], profit=DEFAULT_RATES["profit"],
+                  electricity_rate=DEFAULT_RATES["electricity_rate"],
+                  machine_rate=DEFAULT_RATES["machine_rate"]):
+    """Cost breakdown and final price for a print of weight grams taking time_hours."""
+    material_cost = weight * COST_PER_GRAM
+    electricity_cost = POWER_USAGE_KW * time_hours * electricity_rate
+    machine_cost = machine_rate * time_hours
+    total_cost = material_cost + electricity_cost + machine_cost + post
+    return {
+        "material_cost": material_cost,
+        "electricity_cost": electricity_cost,
+        "machine_cost": machine_cost,
+        "post": post,
+        "total_cost": total_cost,
+        "final_price": total_cost * (1 + profit / 100),
+    }
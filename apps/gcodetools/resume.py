@@ -0,0 +1,208 @@
+"""
+Resume a failed print from a given layer.
+
+write_resume() streams a new file made of a short reconstructed preamble
+followed by the original bytes from the layer's offset on, so nothing but
+the preamble is ever built in memory:
+
+    start heating the bed (last M140/M190 before the layer)
+    G92 Z<layer z>, lift, G28 X Y      Z is never homed into the part
+    heat the hotend (last M104/M109), wait for bed and hotend
+    M201/M203/M204/M205, G90/G91, M82/M83, G92 E<e>, fan
+    travel above the layer's first XY and lower onto it
+    ...original file from the layer marker...
+
+The state is recovered with bytes regexes over the memory-mapped file,
+searching backwards from the layer in growing windows, so most of it comes
+from the few KB just before the layer and only the temperatures (usually
+set once at the top) need a scan of the whole prefix. The layer table
+supplies the layer's Z and byte offset. Compressed input is spooled to a
+plain temp file first, and an output name ending in .gz / .zip is compressed.
+
+    cd apps
+    python -m gcodetools.resume ../Gcode/DBenchy.gcode --z 12.4 -o resumed.gcode
+"""
+
+import argparse
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from . import layers as layer_index
+from .compressed import compressed_writer, spool
+
+SEARCH_WINDOW = 64 * 1024
+DEFAULT_Z_HOP = 5.0         # mm lifted before homing X/Y
+TRAVEL_FEEDRATE = 3000.0    # mm/min
+Z_FEEDRATE = 600.0          # mm/min
+
+_HOTEND = re.compile(rb'^[ \t]*M10[49][ \t][^;\n]*?S(\d+(?:\.\d*)?)', re.MULTILINE)
+_BED = re.compile(rb'^[ \t]*M1[49]0[ \t][^;\n]*?S(\d+(?:\.\d*)?)', re.MULTILINE)
+_FAN = re.compile(rb'^[ \t]*M10([67])\b([^;\n]*)', re.MULTILINE)
+_E_MODE = re.compile(rb'^[ \t]*M8([23])\b', re.MULTILINE)
+_POSITIONING = re.compile(rb'^[ \t]*G9([01])\b', re.MULTILINE)
+_E_POSITION = re.compile(rb'^[ \t]*G(?:[0-3]|92)[ \t][^;\n]*?E(-?\d*\.?\d+)', re.MULTILINE)
+_LIMITS = re.compile(rb'(M20[1345])\b([^;\n]*)')  # literal first: fast over the whole prefix
+_LIMIT_PARAM = re.compile(rb'([A-Z])[ \t]*(-?\d*\.?\d+)')
+_FIRST_XY = re.compile(
+    rb'^[ \t]*G[01][ \t][^;\n]*?X(-?\d*\.?\d+)[^;\n]*?Y(-?\d*\.?\d+)', re.MULTILINE
+)
+_S_PARAM = re.compile(rb'S(\d+(?:\.\d*)?)')
+
+
+def last_match(data, end, pattern, window=SEARCH_WINDOW):
+    """Last match of pattern in data[:end], searching backwards in doubling windows."""
+    start = end
+    while start > 0:
+        start = max(0, start - window)
+        match = None
+        for match in pattern.finditer(data, start, end):
+            pass
+        if match is not None:
+            return match
+        end = min(end, start + 256)  # a line cut by the window edge is searched again
+        window *= 2
+    return None
+
+
+def resume_state(data, offset):
+    """Printer state in force at byte offset of the mapped file."""
+    def value(pattern, default=None):
+        match = last_match(data, offset, pattern)
+        return match.group(1) if match else default
+
+    hotend = value(_HOTEND)
+    bed = value(_BED)
+    fan = last_match(data, offset, _FAN)
+    fan_speed = 0.0
+    if fan is not None and fan.group(1) == b'6':
+        s_param = _S_PARAM.search(fan.group(2))
+        fan_speed = float(s_param.group(1)) if s_param else 255.0
+    limits = {}
+    # Slicers split these ("M205 X8 Y8 Z0.4 E5" then "M205 S0 T0"): merge every
+    # line before the layer, the last value of each parameter wins
+    params = {}
+    for match in _LIMITS.finditer(data, 0, offset):
+        line_start = data.rfind(b'\n', 0, match.start()) + 1
+        if data[line_start:match.start()].strip():
+            continue  # not the command of its line (e.g. in a comment)
+        values = params.setdefault(match.group(1).decode('ascii'), {})
+        for letter, number in _LIMIT_PARAM.findall(match.group(2)):
+            values[letter.decode('ascii')] = number.decode('ascii')
+    for command, values in params.items():
+        if values:
+            limits[command] = command + ''.join(f" {letter}{number}" for letter, number in values.items())
+    e_position = value(_E_POSITION)
+    first_xy = _FIRST_XY.search(data, offset)
+    return {
+        "hotend": float(hotend) if hotend else None,
+        "bed": float(bed) if bed else None,
+        "fan": fan_speed,
+        "relative_e": value(_E_MODE) == b'3',
+        "relative": value(_POSITIONING) == b'1',
+        "e": float(e_position) if e_position else 0.0,
+        "limits": limits,
+        "first_xy": (float(first_xy.group(1)), float(first_xy.group(2))) if first_xy else None,
+    }
+
+
+def resume_preamble(state, layer, source_name="", z_hop=DEFAULT_Z_HOP):
+    """G-code lines that bring the printer to the state the layer expects."""
+    safe_z = layer.z + z_hop
+    lines = [
+        f"; Resumed from {source_name} at layer {layer.number} (Z {layer.z:.3f})",
+        "; The nozzle must be sitting at the failed layer's height when this starts",
+    ]
+    if state["bed"]:
+        lines.append(f"M140 S{state['bed']:g}")  # the bed can start heating at once
+    # Lift and park before the hotend heats, so it does not melt or ooze onto the part
+    lines += [
+        "G90",
+        f"G92 Z{layer.z:.3f} ; declare the current height, Z is not homed",
+        f"G1 Z{safe_z:.3f} F{Z_FEEDRATE:g}",
+        "G28 X Y ; home X and Y only",
+    ]
+    if state["hotend"]:
+        lines.append(f"M104 S{state['hotend']:g}")
+    if state["bed"]:
+        lines.append(f"M190 S{state['bed']:g}")
+    if state["hotend"]:
+        lines.append(f"M109 S{state['hotend']:g}")
+    lines += [state["limits"][command] for command in sorted(state["limits"])]
+    lines.append("M83" if state["relative_e"] else "M82")
+    lines.append("G92 E0" if state["relative_e"] else f"G92 E{state['e']:.5f}")
+    if state["fan"]:
+        lines.append(f"M106 S{state['fan']:g}")
+    else:
+        lines.append("M107")
+    if state["first_xy"]:
+        x, y = state["first_xy"]
+        lines.append(f"G1 X{x:.3f} Y{y:.3f} F{TRAVEL_FEEDRATE:g}")
+    lines.append(f"G1 Z{layer.z:.3f} F{Z_FEEDRATE:g}")
+    if state["relative"]:
+        lines.append("G91")
+    lines.append("; Original G-code follows")
+    return lines
+
+
+def select_layer(layers, number=None, z=None):
+    """Layer by its number, or the one printed at height z."""
+    if number is not None:
+        for layer in layers:
+            if layer.number == number:
+                return layer
+        raise ValueError(f"no layer {number}")
+    if z is not None:
+        index = layer_index.layer_at_z(layers, z)
+        if index is not None:
+            return layers[index]
+        raise ValueError("file has no layers")
+    raise ValueError("give a layer number or a Z height")
+
+
+def write_resume(filename, output, number=None, z=None, layers=None, z_hop=DEFAULT_Z_HOP):
+    """Write the resume file for filename to output; returns the Layer resumed at."""
+    if layers is None:
+        layers = layer_index.load_layer_table(filename)
+    layer = select_layer(layers, number, z)
+
+    directory = os.path.dirname(os.path.abspath(output))
+    with spool(filename) as plain, open(plain, 'rb') as source:
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            state = resume_state(data, layer.offset)
+            preamble = resume_preamble(state, layer, os.path.basename(filename), z_hop)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, compressed_writer(f, output) as out:
+                out.write(('\n'.join(preamble) + '\n').encode('utf-8'))
+                source.seek(layer.offset)
+                shutil.copyfileobj(source, out, 1 << 20)
+            os.replace(tmp_path, output)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return layer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a G-code file resuming a print from a layer")
+    parser.add_argument('file', help="G-code file of the failed print")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--layer', type=int, help="layer number to resume at")
+    where.add_argument('--z', type=float, help="resume at the layer printed at this height (mm)")
+    parser.add_argument('-o', '--output', required=True, help="resume file to write")
+    parser.add_argument('--z-hop', type=float, default=DEFAULT_Z_HOP, help="lift before homing X/Y (mm)")
+    args = parser.parse_args(argv)
+    try:
+        layer = write_resume(args.file, args.output, args.layer, args.z, z_hop=args.z_hop)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Resuming at layer {layer.number} (Z {layer.z:.3f}), written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
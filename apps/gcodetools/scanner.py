@@ -0,0 +1,171 @@
+"""
+Single-pass streaming G-code scanner.
+
+The file is read once in binary chunks and every line is turned into a
+GCodeRecord (command, params, comment). Consumers are fed from that same
+pass, so metadata, estimation and layer indexing no longer re-read the file
+each on their own.
+
+A consumer is any object with:
+    feed(record) -> truthy when it does not need any more records
+    result()     -> whatever the consumer collected
+"""
+
+from collections import namedtuple
+
+from .compressed import open_gcode
+
+CHUNK_SIZE = 1 << 20  # 1 MB reads
+
+MOVE_COMMANDS = ('G0', 'G1', 'G2', 'G3')
+
+# line_no is 0-based, offset is the byte offset of the start of the line.
+# command is None for comment-only / blank lines.
+GCodeRecord = namedtuple("GCodeRecord", "line_no offset command params comment")
+
+
+def parse_line(text):
+    """Split one line of G-code into (command, params, comment)."""
+    code, sep, comment = text.partition(';')
+    comment = comment.strip() if sep else None
+    words = code.split()
+    if not words:
+        return None, {}, comment
+
+    command = words[0].upper()
+    params = {}
+    for word in words[1:]:
+        value = word[1:]
+        try:
+            params[word[0].upper()] = float(value) if value else None
+        except ValueError:
+            params[word[0].upper()] = value
+    return command, params, comment
+
+
+def iter_lines(filename, chunk_size=CHUNK_SIZE):
+    """Yield (line_no, offset, text) for every line of the file."""
+    line_no = 0
+    offset = 0
+    tail = ''
+    with open_gcode(filename) as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            # latin-1 maps bytes 1:1 to characters, so offsets stay byte offsets
+            lines = (tail + chunk.decode('latin-1')).split('\n')
+            tail = lines.pop()
+            for text in lines:
+                yield line_no, offset, text
+                offset += len(text) + 1
+                line_no += 1
+    if tail:
+        yield line_no, offset, tail
+
+
+def iter_records(filename, chunk_size=CHUNK_SIZE):
+    """Yield a GCodeRecord for every line of the file."""
+    for line_no, offset, text in iter_lines(filename, chunk_size):
+        command, params, comment = parse_line(text)
+        yield GCodeRecord(line_no, offset, command, params, comment)
+
+
+def scan(filename, consumers, chunk_size=CHUNK_SIZE):
+    """Feed every record of the file to all consumers in a single pass.
+
+    Stops reading early once every consumer reports it is done.
+    Returns the list of consumer results, in the order given.
+    """
+    active = list(consumers)
+    for record in iter_records(filename, chunk_size):
+        finished = [c for c in active if c.feed(record)]
+        if finished:
+            active = [c for c in active if c not in finished]
+            if not active:
+                break
+    return [c.result() for c in consumers]
+
+
+def _text(value):
+    # Undo the latin-1 decoding for free-form strings (printer names etc.)
+    return value.encode('latin-1').decode('utf-8', 'replace').strip()
+
+
+def _number(convert):
+    return lambda value: convert(float(value))
+
+
+# Cura style header comments ";KEY:value" -> (metadata key, converter)
+HEADER_FIELDS = {
+    "FLAVOR": ("flavor", _text),
+    "TIME": ("time", _number(int)),
+    "Filament used": ("filament", _text),
+    "Layer height": ("layer_height", float),
+    "MINX": ("minx", float),
+    "MINY": ("miny", float),
+    "MINZ": ("minz", float),
+    "MAXX": ("maxx", float),
+    "MAXY": ("maxy", float),
+    "MAXZ": ("maxz", float),
+    "TARGET_MACHINE.NAME": ("printer", _text),
+}
+
+
+def default_metadata():
+    return {
+        "flavor": "Unknown",
+        "time": 0,
+        "filament": "0m",
+        "layer_height": 0.0,
+        "minx": 0.0,
+        "miny": 0.0,
+        "minz": 0.0,
+        "maxx": 0.0,
+        "maxy": 0.0,
+        "maxz": 0.0,
+        "printer": "Unknown",
+        "slicer": "Unknown"
+    }
+
+
+class HeaderMetadata:
+    """Collects the slicer header comments until the first move."""
+
+    def __init__(self):
+        self.metadata = default_metadata()
+
+    def feed(self, record):
+        comment = record.comment
+        if record.command is None and comment:
+            key, sep, value = comment.partition(':')
+            field = HEADER_FIELDS.get(key) if sep else None
+            if field:
+                name, convert = field
+                self.metadata[name] = convert(value)
+            elif comment.startswith('Generated with'):
+                self.metadata["slicer"] = _text(comment.split('with', 1)[1])
+            elif comment.startswith('LAYER_COUNT'):
+                return True
+        return record.command == 'G1'
+
+    def result(self):
+        return self.metadata
+
+
+def is_layer_marker(comment):
+    """True for ';LAYER:n', ';LAYER_CHANGE' and '; layer n' style comments."""
+    lowered = comment.lower()
+    if lowered.startswith('layer height:'):
+        return False
+    return (
+        lowered.startswith('layer:')
+        or lowered.startswith('layer_change')
+        or lowered[:6] in ('layer ', 'layer\t')
+    )
+
+
+def read_metadata(filename):
+    """Header metadata only; stops reading at the first move."""
+    return scan(filename, [HeaderMetadata()])[0]
+
@@ -0,0 +1,123 @@
+"""
+Indexed search over a G-code file.
+
+One scanner pass records a posting list per command (the sorted line numbers
+of every M600, M104, G28 ...) and the line ranges of every ";TYPE:" feature
+block. Queries are then lookups and bisections, with no text search:
+
+    z=12.4                   the layer printed at Z 12.4 (binary search on the layer table)
+    type:Support material    every block of that feature
+    M600 M104                every line with one of those commands
+
+All answers are lists of (first_line, end_line) ranges, end exclusive, which
+the editor can jump to and highlight.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+
+from . import layers as layer_index
+from .scanner import is_layer_marker, scan
+
+
+class SearchIndex:
+    def __init__(self, commands, features, layers, line_count):
+        self.commands = commands      # command -> array('i') of line numbers, sorted
+        self.features = features      # feature name -> array('i') of start, end pairs
+        self.layers = layers          # layer table
+        self.line_count = line_count
+        self.layer_spans = layer_index.layer_spans(layers, line_count)
+        self._layer_z = [layer.z for layer in layers]
+
+    def command_lines(self, *commands):
+        """Sorted line numbers of every occurrence of the given commands."""
+        lists = [self.commands.get(command.upper(), ()) for command in commands]
+        if len(lists) == 1:
+            return list(lists[0])
+        return list(heapq.merge(*lists))
+
+    def command_lines_between(self, command, first, end):
+        """Line numbers of command within [first, end), by bisection."""
+        lines = self.commands.get(command.upper(), ())
+        return list(lines[bisect_left(lines, first):bisect_left(lines, end)])
+
+    def feature_names(self):
+        return sorted(self.features)
+
+    def feature_ranges(self, name):
+        blocks = self.features.get(name)
+        if blocks is None:
+            # Slicers differ in case ("Support material" / "SUPPORT")
+            lowered = name.lower()
+            blocks = next((v for k, v in self.features.items() if k.lower() == lowered), ())
+        return list(zip(blocks[::2], blocks[1::2]))
+
+    def layer_range_at_z(self, z):
+        # Same rule as layers.layer_at_z, on a precomputed Z column
+        if not self._layer_z:
+            return None
+        index = max(bisect_right(self._layer_z, z + 1e-6) - 1, 0)
+        return self.layer_spans[index]
+
+    def query(self, text):
+        """Line ranges matching a query string (see the module docstring)."""
+        text = text.strip()
+        key, sep, value = text.partition('=') if '=' in text else text.partition(':')
+        key = key.strip().lower()
+        if sep and key == 'z':
+            span = self.layer_range_at_z(float(value))
+            return [span] if span else []
+        if sep and key in ('type', 'feature'):
+            return self.feature_ranges(value.strip())
+        return [(line, line + 1) for line in self.command_lines(*text.split())]
+
+
+class CommandIndex:
+    """Scanner consumer collecting the posting lists of a SearchIndex."""
+
+    def __init__(self):
+        self.commands = {}
+        self.features = {}
+        self._feature = None
+        self._line = -1
+
+    def _close_feature(self, line_no):
+        if self._feature is not None:
+            self._feature.append(line_no)
+            self._feature = None
+
+    def feed(self, record):
+        self._line = record.line_no
+        command = record.command
+        if command is None:
+            comment = record.comment
+            if comment:
+                if comment.startswith('TYPE:'):
+                    self._close_feature(record.line_no)
+                    name = comment[5:].strip()
+                    self._feature = self.features.setdefault(name, array('i'))
+                    self._feature.append(record.line_no)
+                elif is_layer_marker(comment):
+                    self._close_feature(record.line_no)
+            return
+        lines = self.commands.get(command)
+        if lines is None:
+            lines = self.commands[command] = array('i')
+        lines.append(record.line_no)
+
+    def result(self):
+        self._close_feature(self._line + 1)
+        return self.commands, self.features, self._line + 1
+
+
+def build_search_index(filename, layers=None):
+    """SearchIndex of filename; pass the layer table when it is already loaded."""
+    consumers = [CommandIndex()]
+    if layers is None:
+        consumers.append(layer_index.LayerTable())
+    results = scan(filename, consumers)
+    commands, features, line_count = results[0]
+    if layers is None:
+        layers = results[1]
+    return SearchIndex(commands, features, layers, line_count)
@@ -0,0 +1,91 @@
+"""
+Toolpath statistics for quoting.
+
+Everything is a reduction over the columns of the MoveTable and the
+per-move times of the estimator, so the whole report is a few NumPy passes:
+
+- retractions (a retraction split over wipe moves counts once) and Z hops
+  (a rise followed by a descent before the next extruding move)
+- travel and extrusion distance
+- maximum and length-weighted average feedrate of printing and travel moves
+- print and travel time, and the time of every layer
+"""
+
+import numpy as np
+
+from .estimator import move_times
+from .filament import retraction_starts
+from .moves import MOVE_EXTRUDE, MOVE_TRAVEL
+
+
+def _speeds(feed, lengths, rows):
+    """(max, length-weighted average) feedrate of rows in mm/s."""
+    if not rows.any():
+        return 0.0, 0.0
+    total = float(lengths[rows].sum())
+    average = float((feed[rows] * lengths[rows]).sum()) / total if total else float(feed[rows].mean())
+    return float(feed[rows].max()) / 60.0, average / 60.0
+
+
+def toolpath_statistics(table, times=None):
+    """Statistics dict of a MoveTable; pass the estimator's move_times() when known."""
+    moves = table.moves
+    if times is None:
+        times = move_times(table)
+    move_type = moves['type']
+    lengths = table.lengths()
+    feed = moves['f'].astype(np.float64)
+    travel = move_type == MOVE_TRAVEL
+    extrude = move_type == MOVE_EXTRUDE
+
+    retractions = int(retraction_starts(move_type).sum())
+
+    # A hop is a Z rise whose next Z change is a descent with nothing printed in
+    # between; the start G-code's lifts before the first layer are not hops
+    _, _, dz = table.deltas()
+    z_moves = np.flatnonzero(dz != 0)
+    printed_before = np.cumsum(extrude) - extrude
+    rise, fall = z_moves[:-1], z_moves[1:]
+    z_hops = int(((dz[rise] > 0) & (dz[fall] < 0) & (printed_before[rise + 1] == printed_before[fall])
+                  & (moves['layer'][rise] >= 0)).sum())
+
+    print_max, print_avg = _speeds(feed, lengths, extrude)
+    travel_max, travel_avg = _speeds(feed, lengths, travel)
+
+    layer = np.maximum(moves['layer'], 0)  # prime lines go with the first layer
+    layer_count = int(layer.max()) + 1 if len(moves) else 0
+    layer_times = np.bincount(layer, weights=times, minlength=layer_count)
+
+    return {
+        "retractions": retractions,
+        "z_hops": z_hops,
+        "travel_mm": float(lengths[travel].sum()),
+        "extrusion_mm": float(lengths[extrude].sum()),
+        "max_print_speed": print_max,
+        "avg_print_speed": print_avg,
+        "max_travel_speed": travel_max,
+        "avg_travel_speed": travel_avg,
+        "print_time": float(times[extrude].sum()),
+        "travel_time": float(times[travel].sum()),
+        "layer_times": [round(float(t), 2) for t in layer_times],
+    }
+
+
+def format_statistics(stats):
+    """Text block for the analysis panel."""
+    layer_times = stats["layer_times"]
+    slowest = max(range(len(layer_times)), key=layer_times.__getitem__) if layer_times else None
+    lines = [
+        f"Retractions:    {stats['retractions']}",
+        f"Z hops:         {stats['z_hops']}",
+        f"Extrusion path: {stats['extrusion_mm'] / 1000:.2f} m",
+        f"Travel path:    {stats['travel_mm'] / 1000:.2f} m",
+        f"Print speed:    avg {stats['avg_print_speed']:.0f} / max {stats['max_print_speed']:.0f} mm/s",
+        f"Travel speed:   avg {stats['avg_travel_speed']:.0f} / max {stats['max_travel_speed']:.0f} mm/s",
+        f"Print / travel: {stats['print_time'] / 60:.0f} / {stats['travel_time'] / 60:.0f} min",
+    ]
+    if slowest is not None:
+        average = sum(layer_times) / len(layer_times)
+        lines.append(f"Layer time:     avg {average:.0f} s, "
+                     f"longest {layer_times[slowest]:.0f} s (layer {slowest})")
+    return "\n".join(lines)
@@ -0,0 +1,38 @@
+"""
+G-code syntax tokens for highlighting.
+
+tokenize() splits one line into (start, end, kind) spans; everything not
+covered is plain text. G-code has no multi-line constructs, so a line's
+spans depend on that line alone and a viewer can tokenize (and cache) just
+the lines it draws.
+"""
+
+import re
+
+from .scanner import is_layer_marker
+
+TOKEN_COMMAND = 'command'   # G1, M104, T0 ...
+TOKEN_AXIS = 'axis'         # X/Y/Z/E words
+TOKEN_PARAM = 'param'       # any other word (F, S, P ...)
+TOKEN_COMMENT = 'comment'
+TOKEN_LAYER = 'layer'       # layer change comments (see scanner.is_layer_marker)
+
+_WORD = re.compile(r'\S+')
+
+
+def tokenize(text):
+    """[(start, end, kind), ...] in line order."""
+    code, sep, comment = text.partition(';')
+    spans = []
+    for i, match in enumerate(_WORD.finditer(code)):
+        if i == 0:
+            kind = TOKEN_COMMAND
+        elif match.group()[0] in 'XYZExyze':
+            kind = TOKEN_AXIS
+        else:
+            kind = TOKEN_PARAM
+        spans.append((match.start(), match.end(), kind))
+    if sep:
+        kind = TOKEN_LAYER if is_layer_marker(comment.strip()) else TOKEN_COMMENT
+        spans.append((len(code), len(text), kind))
+    return spans
@@ -0,0 +1,120 @@
+"""
+Embedded slicer thumbnails.
+
+PrusaSlicer and its forks write preview images into the header of the file
+as base64 comment lines:
+
+    ; thumbnail begin 220x124 12345
+    ; iVBORw0KGgoAAAANSUhEUgAAANwAAAB8CAYAAAA...
+    ; thumbnail end
+
+("thumbnail_JPG" / "thumbnail_QOI" for the other formats). .bgcode files
+keep them in thumbnail blocks instead.
+
+read_thumbnails() reads only the header, up to the first G-code command,
+and keeps the base64 text; the image is decoded on the first access to
+Thumbnail.data. thumbnails() caches the result per file (path, size, mtime),
+so a file browser can ask for the same picture on every repaint.
+"""
+
+import base64
+import os
+import re
+from collections import OrderedDict
+
+from . import bgcode
+from .compressed import compression, open_gcode
+
+HEADER_LIMIT = 4 * 1024 * 1024  # stop looking after this much header
+CACHE_SIZE = 64
+DISPLAY_FORMATS = ('PNG', 'JPG')  # what Qt and the invoice can show
+
+_BEGIN = re.compile(rb'^;\s*thumbnail(?:_(\w+))?\s+begin\s+(\d+)x(\d+)', re.IGNORECASE)
+_END = re.compile(rb'^;\s*thumbnail(?:_\w+)?\s+end', re.IGNORECASE)
+
+_cache = OrderedDict()  # (path, size, mtime) -> [Thumbnail]
+
+
+class Thumbnail:
+    """One embedded image; data is decoded (or read from the .bgcode block) lazily."""
+
+    def __init__(self, format, width, height, load):
+        self.format = format
+        self.width = width
+        self.height = height
+        self._load = load
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._load()
+            self._load = None
+        return self._data
+
+    def __repr__(self):
+        return f"Thumbnail({self.format} {self.width}x{self.height})"
+
+
+def _decoder(encoded):
+    return lambda: base64.b64decode(b''.join(encoded))
+
+
+def _block_reader(filename, block):
+    def load():
+        with bgcode.BGCodeFile(filename) as f:
+            return f.payload(block)
+    return load
+
+
+def read_thumbnails(filename, limit=HEADER_LIMIT):
+    """Thumbnails embedded in filename, in file order (not cached)."""
+    if compression(filename) == 'bgcode':
+        with bgcode.BGCodeFile(filename) as f:
+            return [Thumbnail(fmt, width, height, _block_reader(filename, block))
+                    for fmt, width, height, block in f.thumbnails()]
+
+    found = []
+    current = None  # (format, width, height, base64 lines) while inside a thumbnail
+    read = 0
+    with open_gcode(filename) as f:
+        for line in f:
+            read += len(line)
+            line = line.strip()
+            if current is not None:
+                if _END.match(line):
+                    fmt, width, height, encoded = current
+                    found.append(Thumbnail(fmt, width, height, _decoder(encoded)))
+                    current = None
+                else:
+                    current[3].append(line.lstrip(b'; '))
+                continue
+            if line and not line.startswith(b';'):
+                break  # first command, the header is over
+            begin = _BEGIN.match(line)
+            if begin:
+                fmt = (begin.group(1) or b'PNG').decode('ascii').upper()
+                current = (fmt, int(begin.group(2)), int(begin.group(3)), [])
+            elif read > limit:
+                break
+    return found
+
+
+def thumbnails(filename):
+    """read_thumbnails(), cached until the file changes."""
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+    found = _cache.get(key)
+    if found is None:
+        found = _cache[key] = read_thumbnails(filename)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return found
+
+
+def best_thumbnail(filename, formats=DISPLAY_FORMATS):
+    """Largest thumbnail in one of formats, or None."""
+    candidates = [t for t in thumbnails(filename) if t.format in formats]
+    return max(candidates, key=lambda t: t.width * t.height, default=None)
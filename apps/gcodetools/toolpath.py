@@ -0,0 +1,172 @@
+"""
+Binary toolpath cache.
+
+After the first parse a file's move table, layer table and header metadata
+are written to one binary file; later opens memory-map the move columns
+instead of parsing the text again.
+
+File layout:
+
+    MAGIC (8 bytes) | header length (uint32 LE) | JSON header | padding
+    | moves (raw structured array, 64-byte aligned)
+
+The JSON header carries the format version, the source file stamp (size,
+mtime, content hash), the move dtype and everything else small: layers,
+features, accelerations, machine limits, metadata. A file with another
+version or stamp is ignored and rebuilt.
+"""
+
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from .cache import DEFAULT_CACHE_DIR, cache_key, content_hash, evict_lru
+from .layers import Layer, LayerTable
+from .machine import MachineLimits
+from .moves import MoveExtractor, MoveTable, move_dtype
+from .scanner import HeaderMetadata, scan
+
+MAGIC = b'EMPTGCT\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+SUFFIX = '.gct'
+DEFAULT_TOOLPATH_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), 'toolpaths')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class Toolpath:
+    """Parsed form of a G-code file: header metadata, layer table and moves."""
+
+    def __init__(self, metadata, layers, moves):
+        self.metadata = metadata
+        self.layers = layers
+        self.moves = moves
+
+
+def parse_toolpath(filename, float_type=np.float64):
+    metadata, layers, moves = scan(
+        filename, [HeaderMetadata(), LayerTable(), MoveExtractor(float_type)]
+    )
+    return Toolpath(metadata, layers, moves)
+
+
+def source_stamp(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": content_hash(filename)}
+
+
+def _limits_to_dict(limits):
+    return {"max_accel": limits.max_accel, "max_feedrate": limits.max_feedrate,
+            "jerk": limits.jerk, "accel": limits.accel}
+
+
+def _limits_from_dict(data):
+    limits = MachineLimits()
+    for name, values in data.items():
+        getattr(limits, name).update(values)
+    return limits
+
+
+def write_toolpath(path, toolpath, stamp):
+    """Write toolpath to path atomically (temp file + rename)."""
+    table = toolpath.moves
+    header = {
+        "version": FORMAT_VERSION,
+        "source": stamp,
+        "float_type": table.moves.dtype['x'].name,
+        "count": len(table),
+        "metadata": toolpath.metadata,
+        "layers": [list(layer) for layer in toolpath.layers],
+        "features": table.features,
+        "accel_states": table.accel_states,
+        "limits": _limits_to_dict(table.limits),
+        "arc_lengths": {str(k): v for k, v in table.arc_lengths.items()},
+        "dwell": table.dwell,
+        "start": list(table.start),
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_offset = len(MAGIC) + 4 + len(header_bytes)
+    padding = -data_offset % ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * padding)
+            f.write(np.ascontiguousarray(table.moves).tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_toolpath(path, stamp=None):
+    """Toolpath with memory-mapped moves, or None if missing, old or stale."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get("version") != FORMAT_VERSION:
+        return None
+    if stamp is not None and header.get("source") != stamp:
+        return None
+
+    data_offset = len(MAGIC) + 4 + header_len
+    data_offset += -data_offset % ALIGNMENT
+    dtype = move_dtype(np.dtype(header["float_type"]))
+    if header["count"]:
+        moves = np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=(header["count"],))
+    else:
+        moves = np.empty(0, dtype=dtype)
+
+    table = MoveTable(
+        moves, header["features"], [tuple(s) for s in header["accel_states"]],
+        _limits_from_dict(header["limits"]),
+        {int(k): v for k, v in header["arc_lengths"].items()},
+        header["dwell"], tuple(header["start"]),
+    )
+    layers = [Layer(*row) for row in header["layers"]]
+    return Toolpath(header["metadata"], layers, table)
+
+
+def cache_path(filename, directory=DEFAULT_TOOLPATH_DIR):
+    return os.path.join(directory, cache_key(filename) + SUFFIX)
+
+
+def store_toolpath(filename, toolpath, directory=DEFAULT_TOOLPATH_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """Cache toolpath as the parsed form of filename; False if the cache is not writable."""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        write_toolpath(cache_path(filename, directory), toolpath, source_stamp(filename))
+        evict_lru(directory, max_bytes, SUFFIX)
+    except OSError:
+        return False
+    return True
+
+
+def load_toolpath(filename, directory=DEFAULT_TOOLPATH_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """Toolpath of filename from the binary cache, parsing and caching it on a miss."""
+    stamp = source_stamp(filename)
+    path = cache_path(filename, directory)
+    toolpath = read_toolpath(path, stamp)
+    if toolpath is not None:
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return toolpath
+
+    toolpath = parse_toolpath(filename)
+    # No writable cache dir is fine, the parsed toolpath is still good
+    store_toolpath(filename, toolpath, directory, max_bytes)
+    return toolpath
@@ -0,0 +1,129 @@
+"""
+Background pre-analysis of a G-code drop folder.
+
+FolderPrewarmer notices new and changed .gcode files in a folder and runs
+analysis.analyze_cached() on them in a process pool, so the metadata cache
+and the binary toolpath cache are already filled by the time an operator
+opens the file. It only stats the folder: the GUI drives it from a
+QFileSystemWatcher, the headless loop below just polls.
+
+A file is analyzed once its size and mtime have stayed the same for
+SETTLE_SECONDS, so a slice that is still being copied into the share is
+not analyzed half-written.
+
+    cd apps
+    python -m gcodetools.watch ../Gcode
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import analysis
+from .batch import GCODE_EXTENSIONS
+
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL = 1.0
+
+
+def prewarm_file(filename):
+    """Fill the caches for one file (runs in a worker process)."""
+    analysis.analyze_cached(filename)
+    return filename
+
+
+def _stamp(entry):
+    stat = entry.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FolderPrewarmer:
+    def __init__(self, directory, jobs=None, settle=SETTLE_SECONDS):
+        self.directory = directory
+        self.jobs = jobs
+        self.settle = settle
+        self._done = {}      # path -> stamp already analyzed (or submitted)
+        self._pending = {}   # path -> (stamp, time first seen with that stamp)
+        self._futures = {}   # future -> path
+        self._executor = None
+
+    def scan(self, now=None):
+        """Look for new or changed files; returns how many are waiting to settle."""
+        now = time.monotonic() if now is None else now
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return len(self._pending)
+        for entry in entries:
+            if not entry.name.lower().endswith(GCODE_EXTENSIONS) or not entry.is_file():
+                continue
+            try:
+                stamp = _stamp(entry)
+            except OSError:
+                continue  # removed meanwhile
+            path = entry.path
+            if self._done.get(path) == stamp:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != stamp:
+                self._pending[path] = (stamp, now)
+        return len(self._pending)
+
+    def poll(self, now=None):
+        """Submit settled files and collect finished ones: [(path, error or None)]."""
+        now = time.monotonic() if now is None else now
+        for path, (stamp, since) in list(self._pending.items()):
+            if now - since < self.settle:
+                continue
+            del self._pending[path]
+            self._done[path] = stamp
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+            self._futures[self._executor.submit(prewarm_file, path)] = path
+
+        finished = []
+        for future in [f for f in self._futures if f.done()]:
+            path = self._futures.pop(future)
+            error = future.exception()
+            finished.append((path, None if error is None else str(error)))
+        return finished
+
+    @property
+    def busy(self):
+        return bool(self._pending or self._futures)
+
+    def shutdown(self, wait=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        self._futures.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-analyze G-code files dropped into a folder")
+    parser.add_argument('directory', help="folder to watch")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="seconds between scans")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+
+    prewarmer = FolderPrewarmer(args.directory, args.jobs)
+    try:
+        while True:
+            prewarmer.scan()
+            for path, error in prewarmer.poll():
+                print(f"{'failed' if error else 'ready'}: {path}{f' ({error})' if error else ''}",
+                      flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        prewarmer.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())